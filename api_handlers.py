@@ -1,45 +1,152 @@
-from groq import Groq
-from openai import OpenAI
-import requests
+import http_client
 import os
+import shutil
+import wave
 import logging
+import json
 import time
 from colorama import Fore, Style
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from utils import split_sentences
+from caching import cache_key, normalize_text
+from audio_codec import RATE, audio_cache_id, encode_audio, estimated_bytes_per_second
+from chunking import SEARCH_SECONDS, OVERLAP_SECONDS, silence_aligned_chunks, stitch_transcripts
 
 logger = logging.getLogger(__name__)
 
-def transcribe_audio(audio_file_path, client):
-    """Transcribe audio using Groq API."""
+OPENAI_CHAT_URL = "https://api.openai.com/v1/chat/completions"
+TRANSCRIPTION_MODEL = "whisper-large-v3"
+TRANSCRIPTION_PROMPT = "Please focus solely on transcribing the content of this audio. Do not translate. Maintain the original language and context as accurately as possible."
+TRANSCRIPTION_LANGUAGE = "en"
+TRANSCRIPTION_TEMPERATURE = 0.4
+TRANSLATION_MODEL = "gpt-4"
+TTS_MODEL = "tts-1"
+TTS_FORMAT = "pcm"  # raw 24 kHz mono int16: nothing to decode before playback, and sentences concatenate cleanly
+TTS_RATE = 24000
+TTS_CHUNK_SIZE = 4096
+TTS_MAX_WORKERS = 4  # concurrent sentence syntheses for long translations
+MAX_UPLOAD_MB = 24  # stay below the 25 MB transcription upload limit
+
+def transcribe_audio(audio, client, file_name="audio.wav"):
+    """
+    Transcribe audio using Groq API.
+
+    Args:
+        audio (str or bytes): A path to an audio file, or the encoded audio file itself (e.g. from `encode_wav`).
+        client (Groq): The Groq client instance.
+        file_name (str, optional): The upload name used for in-memory audio; its extension tells the API the
+                                   format. Defaults to "audio.wav".
+
+    Returns:
+        str or None: The transcribed text, or None if the transcription failed.
+    """
     try:
-        logging.info(f"Transcribing audio file: {audio_file_path}")
-        with open(audio_file_path, "rb") as audio_file:
-            response = client.audio.transcriptions.create(
-                file=(os.path.basename(audio_file_path), audio_file),
-                model="whisper-large-v3",
-                prompt="Please focus solely on transcribing the content of this audio. Do not translate. Maintain the original language and context as accurately as possible.",
-                response_format="json",
-                language="en",
-                temperature=0.4
-            )
-            logging.info(f"Transcription response: {response}")
-            return response.text
+        if isinstance(audio, (bytes, bytearray, memoryview)):
+            logging.info(f"Transcribing {len(audio)} bytes of in-memory audio")
+            upload = (file_name, bytes(audio))
+        else:
+            logging.info(f"Transcribing audio file: {audio}")
+            with open(audio, "rb") as audio_file:
+                upload = (os.path.basename(audio), audio_file.read())
+        response = client.audio.transcriptions.create(
+            file=upload,
+            model=TRANSCRIPTION_MODEL,
+            prompt=TRANSCRIPTION_PROMPT,
+            response_format="json",
+            language=TRANSCRIPTION_LANGUAGE,
+            temperature=TRANSCRIPTION_TEMPERATURE
+        )
+        logging.info(f"Transcription response: {response}")
+        return response.text
     except Exception as e:
         logging.error(f"Transcription failed: {e}")
         return None
 
-def translate_text(text, content, openai_api_key):
-    """Translate text using OpenAI API."""
+def transcribe_file(file_path, client, codec="wav", bitrate="32k", cache=None,
+                    chunking=(None, SEARCH_SECONDS, OVERLAP_SECONDS)):
+    """
+    Transcribe an audio file of any length and format (see `audio_codec.AUDIO_EXTENSIONS`).
+
+    The file is decoded as a stream of 16 kHz mono chunks that fit the upload limit with ``codec``, cut in
+    pauses near the target length and overlapping slightly; each chunk is encoded and transcribed in turn,
+    and the texts are stitched without the words the overlaps repeat. Memory use does not depend on the
+    file's length.
+
+    Args:
+        file_path (str): The audio file.
+        client (Groq): The Groq client instance.
+        codec (str, optional): The upload codec. Defaults to "wav".
+        bitrate (str, optional): The bitrate for lossy upload codecs. Defaults to "32k".
+        cache (SQLiteCache, optional): Persistent transcription cache, keyed by `audio_codec.audio_cache_id`
+                                       and the request parameters. Defaults to None.
+        chunking (tuple, optional): ``(chunk_seconds, search_seconds, overlap_seconds)`` from
+                                    `chunking.chunk_settings`. ``chunk_seconds`` of None means chunks are
+                                    only limited by the upload size.
+
+    Returns:
+        str or None: The transcribed text, or None if decoding or any chunk's transcription failed.
+    """
     try:
+        key = None
+        if cache is not None:
+            key = cache_key(
+                audio_cache_id(file_path), TRANSCRIPTION_MODEL, TRANSCRIPTION_PROMPT,
+                TRANSCRIPTION_LANGUAGE, TRANSCRIPTION_TEMPERATURE, codec, bitrate, *chunking,
+            )
+            cached = cache.get(key)
+            if cached is not None:
+                logging.info(f"Transcription cache hit for {file_path}")
+                return cached
+        chunk_seconds, search_seconds, overlap_seconds = chunking
+        chunk_frames = int(MAX_UPLOAD_MB * 1024 * 1024 / estimated_bytes_per_second(codec, bitrate) * RATE)
+        if chunk_seconds:
+            chunk_frames = min(chunk_frames, int(chunk_seconds * RATE))
+        texts = []
+        chunks = silence_aligned_chunks(file_path, chunk_frames, int(search_seconds * RATE), int(overlap_seconds * RATE))
+        for chunk in chunks:
+            upload, upload_name = encode_audio(chunk, codec, RATE, bitrate)
+            text = transcribe_audio(upload, client, file_name=upload_name)
+            if text is None:
+                chunks.close()
+                return None  # a partial transcript would be mistaken for a complete one
+            texts.append(text)
+        transcribed_text = stitch_transcripts(texts)
+        if key is not None and transcribed_text:
+            cache.put(key, transcribed_text)
+        return transcribed_text
+    except OSError as e:
+        logging.error(f"Could not decode {file_path}: {e}")
+        return None
+
+def translation_cache_key(text, content):
+    """Cache key for a translation: the system prompt, the model and the normalized source text."""
+    return cache_key(content, TRANSLATION_MODEL, normalize_text(text))
+
+
+def translate_text(text, content, openai_api_key, cache=None):
+    """
+    Translate text using OpenAI API.
+
+    If a ``cache`` (e.g. from `caching.open_translation_cache`) is given, a previous translation of the same
+    text with the same prompt is returned without a request, and new translations are stored in it.
+    """
+    try:
+        if cache is not None:
+            key = translation_cache_key(text, content)
+            cached = cache.get(key)
+            if cached is not None:
+                logging.info(f"Translation cache hit: {cached}")
+                return cached
         logging.info(f"Translating text: {text}")
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
+        response = http_client.post(
+            OPENAI_CHAT_URL,
             headers={
                 "Content-Type": "application/json",
                 "Authorization": f"Bearer {openai_api_key}",
             },
             json={
-                "model": "gpt-4",
+                "model": TRANSLATION_MODEL,
                 "messages": [
                     {"role": "system", "content": content},
                     {"role": "user", "content": f"{text}"},
@@ -51,6 +158,8 @@ def translate_text(text, content, openai_api_key):
             response_data = response.json()
             translated_text = response_data["choices"][0]["message"]["content"].strip()
             logging.info(f"Translation response: {translated_text}")
+            if cache is not None and translated_text:
+                cache.put(key, translated_text)
             return translated_text
         else:
             logging.error(f"Failed to translate text: {response.text}")
@@ -60,7 +169,109 @@ def translate_text(text, content, openai_api_key):
         return None
     
 
-def voice_stream(input_text, chosen_voice, session_folder, client, play_audio_func):
+def translate_text_stream(text, content, openai_api_key, stats=None, cache=None):
+    """
+    Translate text using the OpenAI API, yielding the translation token by token as it is generated.
+
+    The completion is requested with ``stream=true`` and read as server-sent events. Errors are logged and
+    end the stream early, so callers should treat an empty result as a failed translation.
+
+    Args:
+        text (str): The text to translate.
+        content (str): The system prompt.
+        openai_api_key (str): The OpenAI API key.
+        stats (dict, optional): Filled with ``first_token_ms`` (time to first token, None if no token
+                                arrived) and ``total_ms`` once the stream ends.
+        cache (TwoTierCache, optional): As for `translate_text`; a hit is yielded as a single token.
+
+    Yields:
+        str: Successive pieces of the translated text.
+    """
+    started = time.perf_counter()
+    first_token_at = None
+    pieces = []
+    try:
+        if cache is not None:
+            key = translation_cache_key(text, content)
+            cached = cache.get(key)
+            if cached is not None:
+                first_token_at = time.perf_counter()
+                yield cached
+                return
+        logging.info(f"Translating text (streaming): {text}")
+        response = http_client.post(
+            OPENAI_CHAT_URL,
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {openai_api_key}",
+            },
+            json={
+                "model": TRANSLATION_MODEL,
+                "messages": [
+                    {"role": "system", "content": content},
+                    {"role": "user", "content": f"{text}"},
+                ],
+                "stream": True,
+            },
+            stream=True,
+        )
+        with response:
+            if response.status_code != 200:
+                logging.error(f"Failed to translate text: {response.text}")
+                return
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or []
+                token = choices[0].get("delta", {}).get("content") if choices else None
+                if token:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    pieces.append(token)
+                    yield token
+            else:
+                pieces = []  # the stream ended without [DONE]; do not cache a partial translation
+        translated_text = "".join(pieces).strip()
+        if cache is not None and translated_text:
+            cache.put(key, translated_text)
+    except Exception as e:
+        logging.error(f"Translation failed: {e}")
+    finally:
+        if stats is not None:
+            stats["first_token_ms"] = (first_token_at - started) * 1000 if first_token_at else None
+            stats["total_ms"] = (time.perf_counter() - started) * 1000
+
+
+def link_or_copy(source, destination):
+    """Hard-link ``source`` to ``destination``, copying instead where hard links are not supported."""
+    if os.path.lexists(destination):
+        os.remove(destination)  # never write through an existing link into another cached blob
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+def synthesize_speech(input_text, chosen_voice, client):
+    """Synthesize ``input_text`` with the OpenAI TTS API and return the complete audio as bytes."""
+    response = client.audio.speech.create(
+        model=TTS_MODEL, voice=chosen_voice, input=input_text, response_format=TTS_FORMAT
+    )
+    return response.content
+
+
+def stream_speech(input_text, chosen_voice, client):
+    """Synthesize ``input_text`` with the OpenAI TTS API, yielding the audio in chunks as it downloads."""
+    with client.audio.speech.with_streaming_response.create(
+        model=TTS_MODEL, voice=chosen_voice, input=input_text, response_format=TTS_FORMAT
+    ) as response:
+        yield from response.iter_bytes(TTS_CHUNK_SIZE)
+
+
+def voice_stream(input_text, chosen_voice, session_folder, client, play_audio_func, audio_cache=None):
     """
     Converts the given text into speech using the specified voice, through the OpenAI API's text-to-speech synthesis.
     The generated speech is both played immediately and saved as an audio file in the specified session folder.
@@ -74,7 +285,10 @@ def voice_stream(input_text, chosen_voice, session_folder, client, play_audio_fu
         chosen_voice (str): The identifier of the voice model to be used for the synthesis.
         session_folder (str): The directory path where the synthesized audio file will be saved.
         client (OpenAI): The OpenAI client instance.
-        play_audio_func (function): A function to play the audio content.
+        play_audio_func (function): A function to play the audio content, accepting an ``audio_stream``
+                                    iterable of raw PCM chunks with their ``pcm_rate``, or a ``file_path``.
+        audio_cache (FileBlobStore, optional): Store of previously synthesized speech, keyed by voice, model
+                                               and text. Defaults to None.
 
     Returns:
         str: The file path of the saved AI audio file, allowing for subsequent access and replay.
@@ -83,21 +297,70 @@ def voice_stream(input_text, chosen_voice, session_folder, client, play_audio_fu
         Exception: An exception is raised and logged if there's an error during the synthesis process.
 
     Notes:
-        The function first synthesizes the speech and then saves the audio content in a WAV file within the session folder.
-        The filename includes a timestamp to ensure uniqueness. After saving, the function also plays the audio file for immediate feedback.
+        The synthesized speech is requested as raw PCM and consumed as a byte stream: each chunk is passed to
+        the player as soon as it arrives and simultaneously written to a WAV file within the session folder, so
+        playback starts before the download completes. The filename includes a timestamp down to the microsecond,
+        so clips finishing in the same second (e.g. cache hits) never replace each other.
+
+        Text with several sentences is split with `split_sentences` and the sentences are synthesized
+        concurrently (up to TTS_MAX_WORKERS at a time). Playback begins as soon as the first sentence is ready
+        and continues in order, and the session file holds all sentences concatenated.
+
+        With an ``audio_cache``, speech that was synthesized before is played straight from the store without
+        an API call, and new speech is added to it. The session file is then a hard link to the stored blob
+        (a copy only where links are unsupported), so replaying it reads the same file.
     """
+    write_path = None
     try:
-        response = client.audio.speech.create(
-            model="tts-1", voice=chosen_voice, input=input_text
-        )
-        ai_audio_filename = f"ai_voice_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
+        ai_audio_filename = f"ai_voice_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.wav"
         ai_audio_path = os.path.join(session_folder, ai_audio_filename)
-        with open(ai_audio_path, "wb") as f:
-            f.write(response.content)
+        key = cache_key(chosen_voice, TTS_MODEL, TTS_FORMAT, input_text)
+        cached_path = audio_cache.get(key) if audio_cache else None
+        if cached_path:
+            logging.info(f"TTS cache hit: {cached_path}")
+            link_or_copy(cached_path, ai_audio_path)
+            play_audio_func(file_path=cached_path)
+            return ai_audio_path
+
+        write_path = audio_cache.temp_path(key) if audio_cache else ai_audio_path
+        segments = split_sentences(input_text)
+        with ThreadPoolExecutor(max_workers=TTS_MAX_WORKERS) as pool, wave.open(write_path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(TTS_RATE)
+            if len(segments) > 1:
+                # Synthesize sentences concurrently; they are played and saved strictly in order
+                futures = [pool.submit(synthesize_speech, segment, chosen_voice, client) for segment in segments]
+                source = (future.result() for future in futures)
+            else:
+                source = stream_speech(input_text, chosen_voice, client)
+
+            # The player swallows errors raised by its stream, so a failed download is noted here and
+            # re-raised once playback has returned; otherwise a truncated clip would be saved and cached.
+            download_error = []
+
+            def tee_chunks():
+                try:
+                    for chunk in source:
+                        f.writeframesraw(chunk)
+                        yield chunk
+                except Exception as e:
+                    download_error.append(e)
+                    raise
+
+            chunks = tee_chunks()
+            play_audio_func(audio_stream=chunks, pcm_rate=TTS_RATE)  # Playback starts with the first chunk
+            for _ in chunks:  # Finish saving if playback stopped early
+                pass
+            if download_error:
+                raise download_error[0]
+        if audio_cache:
+            link_or_copy(audio_cache.commit(key, write_path), ai_audio_path)
         print(f"AI voice saved in {ai_audio_path}")
-        play_audio_func(response.content)  # Play the audio
     except Exception as e:
         logger.error(Fore.RED + f"Failed to speak text: {e}\n")
+        if write_path and os.path.exists(write_path):
+            os.remove(write_path)  # never keep (or cache) a partial clip
         return None
     return ai_audio_path  # Return the path to the saved AI audio file
 
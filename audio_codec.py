@@ -0,0 +1,332 @@
+import hashlib
+import logging
+import re
+import shutil
+import struct
+import subprocess
+import sys
+import time
+import wave
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Defaults match the capture format used in audio_processing
+RATE = 16000
+CHANNELS = 1
+SAMPLE_WIDTH = 2
+
+# Upload codecs: the file extension the API uses to detect the format, and the ffmpeg output arguments.
+# WAV is encoded in-process; everything else is piped through a local ffmpeg.
+UPLOAD_CODECS = {
+    "wav": {"extension": "wav", "ffmpeg_args": None},
+    "flac": {"extension": "flac", "ffmpeg_args": ["-c:a", "flac", "-compression_level", "5", "-f", "flac"]},
+    "opus": {"extension": "ogg", "ffmpeg_args": ["-c:a", "libopus", "-application", "voip", "-compression_level", "5", "-f", "ogg"]},
+    "mp3": {"extension": "mp3", "ffmpeg_args": ["-c:a", "libmp3lame", "-f", "mp3"]},
+}
+DEFAULT_BITRATE = "32k"  # only used by the lossy codecs
+
+# Input formats `stream_pcm` can decode (anything else ffmpeg reads works too, but is not offered)
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".flac")
+
+
+def wav_header(num_frames, rate=RATE, channels=CHANNELS, sample_width=SAMPLE_WIDTH):
+    """
+    Build the 44-byte RIFF/WAVE header for uncompressed PCM audio.
+
+    Args:
+        num_frames (int): The number of frames (samples per channel) in the data chunk.
+        rate (int, optional): The sample rate. Defaults to RATE.
+        channels (int, optional): The number of channels. Defaults to CHANNELS.
+        sample_width (int, optional): Bytes per sample. Defaults to SAMPLE_WIDTH.
+
+    Returns:
+        bytes: The header to be followed by the raw little-endian PCM data.
+    """
+    data_size = num_frames * channels * sample_width
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, channels, rate, rate * channels * sample_width, channels * sample_width, sample_width * 8,
+        b"data", data_size,
+    )
+
+
+def encode_wav(samples, rate=RATE):
+    """
+    Encode int16 samples as an in-memory WAV file.
+
+    The header is prepended to a memoryview of the NumPy data, so the samples are copied exactly once,
+    straight into the output buffer. The result is safe to keep after the source array is reused.
+
+    Args:
+        samples (numpy.ndarray): 1-D (mono) or 2-D ``(frames, channels)`` int16 audio.
+        rate (int, optional): The sample rate. Defaults to RATE.
+
+    Returns:
+        bytes: A complete WAV file.
+    """
+    samples = np.ascontiguousarray(samples, dtype="<i2")
+    channels = 1 if samples.ndim == 1 else samples.shape[1]
+    num_frames = samples.shape[0]
+    return b"".join((wav_header(num_frames, rate, channels), memoryview(samples).cast("B")))
+
+
+
+def upload_settings(config):
+    """
+    Read the upload codec settings from the ``upload`` section of config.yaml.
+
+    Returns:
+        tuple: ``(codec, bitrate)``. Unknown codecs fall back to "wav" with a warning.
+    """
+    upload = (config or {}).get("upload") or {}
+    codec = str(upload.get("codec", "wav")).lower()
+    if codec not in UPLOAD_CODECS:
+        logger.warning(f"Unknown upload codec '{codec}', falling back to wav")
+        codec = "wav"
+    return codec, str(upload.get("bitrate", DEFAULT_BITRATE))
+
+
+def encode_audio(samples, codec="wav", rate=RATE, bitrate=DEFAULT_BITRATE):
+    """
+    Encode int16 samples for upload with the requested codec.
+
+    Compressed codecs are produced by piping raw PCM through ``ffmpeg``. If ffmpeg is missing or fails,
+    the audio is sent as WAV instead so that a transcription request is never lost to an encoder problem.
+
+    Args:
+        samples (numpy.ndarray): 1-D (mono) or 2-D ``(frames, channels)`` int16 audio.
+        codec (str, optional): One of ``UPLOAD_CODECS``. Defaults to "wav".
+        rate (int, optional): The sample rate of ``samples``. Defaults to RATE.
+        bitrate (str, optional): Target bitrate for opus/mp3, in ffmpeg notation. Defaults to DEFAULT_BITRATE.
+
+    Returns:
+        tuple: ``(data, file_name)`` where ``file_name`` carries the extension the API needs, e.g. "audio.flac".
+    """
+    ffmpeg_args = UPLOAD_CODECS[codec]["ffmpeg_args"]
+    if ffmpeg_args is not None:
+        samples = np.ascontiguousarray(samples, dtype="<i2")
+        channels = 1 if samples.ndim == 1 else samples.shape[1]
+        cmd = [
+            "ffmpeg", "-hide_banner", "-loglevel", "error",
+            "-f", "s16le", "-ar", str(rate), "-ac", str(channels), "-i", "pipe:0",
+        ] + ffmpeg_args
+        if codec != "flac":
+            cmd += ["-b:a", bitrate]
+        cmd.append("pipe:1")
+        try:
+            result = subprocess.run(cmd, input=memoryview(samples).cast("B"), capture_output=True, check=True)
+            return result.stdout, f"audio.{UPLOAD_CODECS[codec]['extension']}"
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.warning(f"ffmpeg {codec} encoding failed ({e}); uploading WAV instead")
+    return encode_wav(samples, rate), "audio.wav"
+
+
+def estimated_bytes_per_second(codec, bitrate=DEFAULT_BITRATE, rate=RATE, channels=CHANNELS):
+    """
+    Conservative upload size estimate used to size chunks against the API's file size limit.
+
+    FLAC on speech typically lands at 40-60% of PCM, so 75% is assumed; the lossy codecs are assumed to
+    overshoot their nominal bitrate by 10% for container overhead.
+    """
+    pcm = rate * channels * SAMPLE_WIDTH
+    if codec == "wav":
+        return pcm
+    if codec == "flac":
+        return int(pcm * 0.75)
+    kbps = float(bitrate.lower().rstrip("k"))
+    return int(kbps * 1000 / 8 * 1.1)
+
+
+def audio_fingerprint(path, block_frames=65536):
+    """
+    Hash the decoded audio of a file, so the same recording is recognised regardless of container,
+    metadata or file name.
+
+    PCM WAV files are read directly with the `wave` module; anything else is decoded to 16 kHz mono
+    int16 by ffmpeg. The audio is hashed block by block, so memory use does not grow with file length.
+
+    Args:
+        path (str): The audio file.
+        block_frames (int, optional): Frames read per block. Defaults to 65536.
+
+    Returns:
+        str: A hex SHA-256 digest of the decoded samples and their format.
+
+    Raises:
+        OSError: If the file cannot be decoded.
+    """
+    digest = hashlib.sha256()
+    if str(path).lower().endswith(".wav"):
+        try:
+            with wave.open(str(path), "rb") as wav_file:
+                digest.update(f"wav:{wav_file.getframerate()}:{wav_file.getnchannels()}:{wav_file.getsampwidth()}".encode())
+                while True:
+                    frames = wav_file.readframes(block_frames)
+                    if not frames:
+                        return digest.hexdigest()
+                    digest.update(frames)
+        except (wave.Error, EOFError):
+            digest = hashlib.sha256()  # not plain PCM (e.g. float, extensible or truncated); let ffmpeg decode it
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", str(path),
+           "-f", "s16le", "-ac", str(CHANNELS), "-ar", str(RATE), "pipe:1"]
+    digest.update(f"s16le:{RATE}:{CHANNELS}".encode())
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as proc:
+        while True:
+            block = proc.stdout.read(block_frames * SAMPLE_WIDTH)
+            if not block:
+                break
+            digest.update(block)
+    if proc.returncode != 0:
+        raise OSError(f"ffmpeg could not decode {path}")
+    return digest.hexdigest()
+
+
+def audio_cache_id(path, block_size=1024 * 1024):
+    """
+    Identify an audio file for the transcription cache without decoding it a second time.
+
+    Plain PCM WAV files are identified by `audio_fingerprint`, which reads their samples directly. Any other
+    file would need a full ffmpeg decode on top of the one transcription does, so it is identified by a hash
+    of its bytes instead: the same file is recognised, but a re-encoded or re-tagged copy is transcribed again.
+
+    Args:
+        path (str): The audio file.
+        block_size (int, optional): Bytes hashed per read. Defaults to 1 MB.
+
+    Returns:
+        str: A hex SHA-256 digest.
+
+    Raises:
+        OSError: If the file cannot be read.
+    """
+    if str(path).lower().endswith(".wav"):
+        try:
+            with wave.open(str(path), "rb"):
+                pass
+        except (wave.Error, EOFError):
+            pass  # not plain PCM; hash the bytes
+        else:
+            return audio_fingerprint(path)
+    digest = hashlib.sha256(b"file:")
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def audio_duration(path):
+    """
+    Return the duration of an audio file in seconds without decoding it, or None if it cannot be read.
+
+    WAV headers are read with the `wave` module; other formats are probed with ffprobe.
+    """
+    if str(path).lower().endswith(".wav"):
+        try:
+            with wave.open(str(path), "rb") as wav_file:
+                return wav_file.getnframes() / wav_file.getframerate()
+        except (wave.Error, EOFError):
+            pass
+    cmd = ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", str(path)]
+    try:
+        return float(subprocess.run(cmd, capture_output=True, check=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        pass
+    # No ffprobe: ffmpeg prints "Duration: HH:MM:SS.ss" while failing for lack of an output file
+    try:
+        banner = subprocess.run(["ffmpeg", "-hide_banner", "-i", str(path)], capture_output=True, text=True).stderr
+    except OSError:
+        return None
+    match = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", banner)
+    if match is None:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def stream_pcm(path, window_frames, rate=RATE):
+    """
+    Decode an audio file incrementally into fixed-size windows of mono int16 samples.
+
+    Only one window is held in memory at a time, so memory use is flat regardless of the file's length.
+    WAV files that are already 16-bit mono at ``rate`` are read directly; everything else (other WAV
+    layouts, mp3, m4a, flac, ...) is decoded and resampled by an ffmpeg subprocess and read from its pipe.
+    Closing the generator early stops the decoder.
+
+    Args:
+        path (str): The audio file.
+        window_frames (int): Frames per window. Only the last window may be shorter.
+        rate (int, optional): The output sample rate. Defaults to RATE.
+
+    Yields:
+        numpy.ndarray: 1-D int16 windows.
+
+    Raises:
+        OSError: If the file cannot be decoded.
+    """
+    if str(path).lower().endswith(".wav"):
+        try:
+            wav_file = wave.open(str(path), "rb")
+        except (wave.Error, EOFError):
+            wav_file = None  # not plain PCM (e.g. float or extensible); let ffmpeg decode it
+        if wav_file is not None:
+            with wav_file:
+                layout = (wav_file.getframerate(), wav_file.getnchannels(), wav_file.getsampwidth())
+                if layout == (rate, 1, SAMPLE_WIDTH):
+                    while True:
+                        frames = wav_file.readframes(window_frames)
+                        if not frames:
+                            return
+                        yield np.frombuffer(frames, dtype="<i2")
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", str(path),
+           "-f", "s16le", "-ac", "1", "-ar", str(rate), "pipe:1"]
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as proc:
+        try:
+            while True:
+                block = proc.stdout.read(window_frames * SAMPLE_WIDTH)
+                if not block:
+                    break
+                yield np.frombuffer(block[:len(block) - len(block) % SAMPLE_WIDTH], dtype="<i2")
+        finally:
+            if proc.poll() is None:
+                proc.kill()  # the consumer stopped early
+    if proc.returncode != 0:
+        raise OSError(f"ffmpeg could not decode {path}")
+
+
+def benchmark_codecs(samples, rate=RATE, bitrate=DEFAULT_BITRATE):
+    """
+    Compare bytes-on-wire against encode time for every upload codec.
+
+    Returns:
+        list: One ``(codec, size_bytes, ratio_vs_wav, encode_ms)`` tuple per codec.
+    """
+    results = []
+    wav_size = None
+    for codec in UPLOAD_CODECS:
+        if UPLOAD_CODECS[codec]["ffmpeg_args"] and shutil.which("ffmpeg") is None:
+            continue
+        started = time.perf_counter()
+        data, _ = encode_audio(samples, codec, rate, bitrate)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        wav_size = wav_size or len(data)
+        results.append((codec, len(data), len(data) / wav_size, elapsed_ms))
+    return results
+
+
+if __name__ == "__main__":
+    # Usage: python audio_codec.py recording.wav [bitrate]
+    import wave
+
+    with wave.open(sys.argv[1], "rb") as wav_file:
+        if wav_file.getsampwidth() != SAMPLE_WIDTH:
+            sys.exit("Only 16-bit PCM WAV files are supported")
+        channels = wav_file.getnchannels()
+        samples = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype="<i2").reshape(-1, channels)
+        file_rate = wav_file.getframerate()
+    duration = len(samples) / file_rate
+    print(f"{sys.argv[1]}: {duration:.1f} s, {file_rate} Hz, {channels} ch")
+    print(f"{'codec':<6} {'bytes':>12} {'vs wav':>8} {'encode ms':>10} {'x realtime':>11}")
+    for codec, size, ratio, encode_ms in benchmark_codecs(samples, file_rate, *sys.argv[2:3]):
+        print(f"{codec:<6} {size:>12,} {ratio:>8.1%} {encode_ms:>10.1f} {duration * 1000 / max(encode_ms, 1e-3):>11.0f}")
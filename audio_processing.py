@@ -5,10 +5,11 @@ import subprocess
 from pynput import keyboard
 from datetime import datetime
 import numpy as np
-import time
 import sys
 import logging
-from colorama import Fore, Style
+import queue
+import wave
+from playback import get_player
 
 # Constants for recording
 CHANNELS = 1
@@ -16,10 +17,12 @@ SAMPLE_WIDTH = 2
 RATE = 16000
 FORMAT = "int16"
 WAVE_OUTPUT_FILENAME = "temp_audio.wav"
+BLOCK_SIZE = 1600  # 100 ms of audio per InputStream callback
+MAX_UTTERANCE_SECONDS = 45
+PRE_ROLL_SECONDS = 0.2  # audio kept from just before the start key, so first words are not clipped
 
 # Global variables
 audio_frames = []
-is_recording = False
 
 
 def record_audio(duration, session_folder):
@@ -41,24 +44,49 @@ def record_audio(duration, session_folder):
         logging.error(f"Error during recording: {e}")
         return None
 
-def play_audio(audio_content=None, file_path=None):
+def play_audio(audio_content=None, file_path=None, audio_stream=None, pcm_rate=None, cancel=None):
     """
-    Play audio using ffplay.
+    Play audio through the persistent in-process output stream, or with ffplay where that is not possible.
+
+    Raw PCM and 16-bit WAV files are played in-process by the shared `playback.AudioPlayer`, which keeps the
+    audio device open between clips. Encoded audio (e.g. mp3), or any audio when no output device can be
+    opened, is handed to a new ffplay process instead.
 
     Args:
         audio_content (bytes, optional): The audio content to play. Defaults to None.
         file_path (str, optional): The path to the audio file to play. Defaults to None.
+        audio_stream (iterable, optional): Chunks of audio (bytes) that are fed to the player as they
+                                           arrive, so playback starts with the first chunk. Defaults to None.
+        pcm_rate (int, optional): Set when ``audio_content`` or ``audio_stream`` is raw mono int16 PCM at this
+                                  sample rate rather than an encoded file. Defaults to None.
+        cancel (threading.Event, optional): Stops playback promptly when set (barge-in). Defaults to None.
 
     Raises:
         Exception: If an error occurs during audio playback.
     """
     try:
+        player = get_player()
+        if player is not None and (file_path or pcm_rate):
+            try:
+                if file_path:
+                    player.play_wav(file_path, cancel)
+                else:
+                    player.play_pcm(audio_stream if audio_stream is not None else [audio_content], pcm_rate, cancel=cancel)
+                return
+            except (wave.Error, EOFError):
+                pass  # not a PCM WAV file; let ffplay decode it
+
         cmd = ["ffplay", "-nodisp", "-autoexit"]
         stdin_pipe = None
 
         if file_path:
             cmd.append(file_path)
         else:
+            if pcm_rate:
+                cmd += ["-f", "s16le", "-ar", str(pcm_rate)]
+            elif audio_stream is not None:
+                # Start as soon as the format is known instead of buffering for a full probe
+                cmd += ["-probesize", "8192", "-analyzeduration", "0"]
             cmd.append("-")
             stdin_pipe = subprocess.PIPE
 
@@ -69,12 +97,25 @@ def play_audio(audio_content=None, file_path=None):
             stderr=subprocess.STDOUT,
         )
 
-        if audio_content and not file_path:
+        if audio_stream is not None and not file_path:
+            for chunk in audio_stream:
+                if cancel is not None and cancel.is_set():
+                    break
+                ffplay_proc.stdin.write(chunk)
+                ffplay_proc.stdin.flush()
+            ffplay_proc.stdin.close()
+        elif audio_content and not file_path:
             ffplay_proc.stdin.write(audio_content)
             ffplay_proc.stdin.flush()
             ffplay_proc.stdin.close()
 
-        ffplay_proc.wait()
+        if cancel is None:
+            ffplay_proc.wait()
+            return
+        while ffplay_proc.poll() is None:
+            if cancel.wait(0.05):
+                ffplay_proc.kill()
+                ffplay_proc.wait()
     except Exception as e:
         print(f"Error playing audio: {e}")
 
@@ -115,76 +156,362 @@ def clear_audio_frames():
     audio_frames = []
 
 
-def record_audio_continuous():
+class AudioRingBuffer:
+    """
+    Preallocated int16 ring buffer used for gapless capture.
+
+    Every block is written twice (at ``pos`` and ``pos + capacity``) so that any window of up to
+    ``capacity`` frames can be read back as one contiguous NumPy view, without copying or
+    concatenating blocks.
+
+    Args:
+        capacity_seconds (float): How much audio the buffer retains.
+        rate (int, optional): The sample rate of the audio. Defaults to RATE.
+    """
+
+    def __init__(self, capacity_seconds, rate=RATE):
+        self.capacity = int(capacity_seconds * rate)
+        self._data = np.zeros(2 * self.capacity, dtype=np.int16)
+        self.frames_written = 0
+
+    def write(self, block):
+        """Append a 1-D int16 block to the buffer, overwriting the oldest audio once full."""
+        n = len(block)
+        if n > self.capacity:
+            self.frames_written += n - self.capacity
+            block = block[-self.capacity:]
+            n = self.capacity
+        cap = self.capacity
+        pos = self.frames_written % cap
+        self._data[pos:pos + n] = block
+        if pos + n <= cap:
+            self._data[pos + cap:pos + cap + n] = block
+        else:
+            split = cap - pos
+            self._data[pos + cap:] = block[:split]
+            self._data[:n - split] = block[split:]
+        # Publish the new frames only after the samples are in place.
+        self.frames_written += n
+
+    def view(self, start, end=None):
+        """
+        Return the frames in ``[start, end)`` (absolute frame indices) as a contiguous view.
+
+        Frames older than ``capacity`` are no longer available, so the window is clamped to the most
+        recent ``capacity`` frames. The view aliases the buffer: copy or encode it before the buffer
+        wraps around.
+        """
+        if end is None:
+            end = self.frames_written
+        start = max(start, end - self.capacity, 0)
+        offset = start % self.capacity
+        return self._data[offset:offset + (end - start)]
+
+
+class ContinuousRecorder:
     """
-    Initiates continuous audio recording, storing incoming audio frames in memory until the recording is
-    stopped. It relies on the `sounddevice.InputStream` to capture audio in real-time, with a designated
-    callback function that processes and stores each audio frame.
+    Owns a single long-lived ``sounddevice.InputStream`` that feeds an ``AudioRingBuffer``.
 
-    This function is designed to be part of a larger system that requires real-time audio data capture, such
-    as a speech translation or voice command application. It will record indefinitely until the `is_recording`
-    global variable is explicitly set to False, typically by another part of the application in response to
-    a user command or action.
+    The stream stays open for the whole session, so there is no gap between utterances and no
+    per-block allocation; utterances are delimited by marking positions in the ring buffer.
+
+    Args:
+        max_seconds (float, optional): The longest utterance that can be retrieved. Defaults to MAX_UTTERANCE_SECONDS.
+        pre_roll (float, optional): Seconds of audio captured before ``begin_utterance`` that are included
+                                    in the utterance. Defaults to PRE_ROLL_SECONDS.
+    """
+
+    def __init__(self, max_seconds=MAX_UTTERANCE_SECONDS, pre_roll=PRE_ROLL_SECONDS):
+        self.max_frames = int(max_seconds * RATE)
+        self.pre_roll_frames = int(pre_roll * RATE)
+        # Twice the longest utterance, so a handed-off view survives while the next one is captured.
+        self.ring = AudioRingBuffer(2 * (max_seconds + pre_roll))
+        # Called on the audio thread after each captured block, to wake a consumer instead of having it poll
+        self.on_block = None
+        self._stream = None
+        self._utterance_start = None
+
+    def start(self):
+        """Open the input stream. Capture runs on the sounddevice thread until ``close`` is called."""
+        if self._stream is None:
+            self._stream = sd.InputStream(
+                channels=CHANNELS, samplerate=RATE, dtype=FORMAT, blocksize=BLOCK_SIZE, callback=self._callback
+            )
+            self._stream.start()
+
+    def close(self):
+        """Stop and close the input stream."""
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+    def _callback(self, indata, frames, time, status):
+        """
+        Callback for the sounddevice.InputStream that copies each captured block into the ring buffer.
+
+        Notes:
+            - ``indata`` is written straight into the preallocated buffer; nothing is allocated per block.
+            - ``on_block``, if set, is called afterwards; it must be quick and must not block (e.g. a queue put).
+            - Any important `status` flags are printed to the standard error stream to alert of issues like buffer overflows.
+        """
+        self.ring.write(indata[:, 0])
+        if status:
+            print(status, file=sys.stderr)
+        on_block = self.on_block
+        if on_block is not None:
+            on_block()
+
+    @property
+    def is_recording(self):
+        return self._utterance_start is not None
+
+    def begin_utterance(self, at=None):
+        """
+        Mark the start of an utterance, minus the pre-roll.
+
+        Args:
+            at (int, optional): Absolute frame index where the utterance starts (e.g. a VAD onset).
+                                Defaults to the current capture position.
+        """
+        if at is None:
+            at = self.ring.frames_written
+        self._utterance_start = max(at - self.pre_roll_frames, 0)
+
+    def elapsed(self):
+        """Return the length of the current utterance in seconds, or 0 if none is in progress."""
+        if self._utterance_start is None:
+            return 0.0
+        return (self.ring.frames_written - self._utterance_start) / RATE
+
+    def end_utterance(self, at=None):
+        """
+        Close the current utterance and hand it off.
+
+        Args:
+            at (int, optional): Absolute frame index where the utterance ends (e.g. a VAD endpoint).
+                                Defaults to the current capture position.
+
+        Returns:
+            numpy.ndarray: A contiguous int16 view of the utterance (at most ``max_seconds`` long), or an
+                           empty array if no utterance was in progress.
+        """
+        if self._utterance_start is None:
+            return np.zeros(0, dtype=np.int16)
+        start, self._utterance_start = self._utterance_start, None
+        if at is None:
+            at = self.ring.frames_written
+        end = min(at, start + self.max_frames + self.pre_roll_frames)
+        return self.ring.view(start, end)
+
+
+def detect_speech_frames(samples, frame_length, energy_threshold=500, zcr_threshold=0.25):
+    """
+    Classify fixed-size frames of int16 audio as speech or silence.
+
+    The samples are reshaped into a ``(n_frames, frame_length)`` matrix and the short-time RMS energy and
+    zero-crossing rate are computed for all frames at once. A frame counts as speech when it is loud enough
+    (voiced speech), or moderately loud with a high zero-crossing rate (unvoiced consonants such as "s" or "f").
+
+    Args:
+        samples (numpy.ndarray): 1-D int16 audio. Trailing samples that do not fill a whole frame are ignored.
+        frame_length (int): The number of samples per frame.
+        energy_threshold (float, optional): RMS level (in int16 units) above which a frame is voiced. Defaults to 500.
+        zcr_threshold (float, optional): Zero-crossing rate above which a quieter frame is treated as unvoiced
+                                         speech. Defaults to 0.25.
 
     Returns:
-        bytes: A bytes object that contains all recorded audio frames concatenated together. This object can
-               be written to a file, processed, or streamed further depending on the application's requirements.
+        numpy.ndarray: A boolean array with one entry per whole frame.
+    """
+    n_frames = len(samples) // frame_length
+    if n_frames == 0:
+        return np.zeros(0, dtype=bool)
+    frames = samples[:n_frames * frame_length].reshape(n_frames, frame_length).astype(np.float32)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    zcr = np.count_nonzero(np.diff(np.signbit(frames), axis=1), axis=1) / frame_length
+    voiced = rms >= energy_threshold
+    unvoiced = (rms >= energy_threshold * 0.5) & (zcr >= zcr_threshold)
+    return voiced | unvoiced
+
+
+def trim_silence(samples, energy_threshold=500, zcr_threshold=0.25, frame_ms=30, padding_ms=200, max_pause_ms=800):
+    """
+    Remove leading/trailing silence from a recording and shorten long pauses inside it.
 
-    Notes:
-        The recording loop runs on the main thread, with actual audio capture happening on a background thread
-        managed by the `sounddevice` library. The function prints a message to the console indicating it is
-        ready to record and will continue to do so until it is instructed to stop.
-
-    Example:
-        # Begin recording
-        audio_data = record_audio_continuous()
-        # To stop recording, set is_recording to False from another thread or signal handler.
-    """
-    global is_recording
-    is_recording = True
-    print(Fore.GREEN + "Say 'stop' to end recording..." + Style.RESET_ALL)
-    with sd.InputStream(channels=CHANNELS, samplerate=RATE, callback=record_callback):
-        while is_recording:
-            time.sleep(0.1)
-    return b"".join(audio_frames)
-
-def record_callback(indata, frames, time, status):
-    """
-    Callback function for the sounddevice.InputStream that processes incoming audio data.
-    This function is called from a separate thread for each audio block captured by the
-    audio input stream. It appends the captured audio frames to a global list if recording
-    is active. It also handles the reporting of any audio stream statuses, such as overflows
-    or underflows, which are indicators of potential issues with the recording process.
-
-    Parameters:
-        indata (numpy.ndarray): A two-dimensional NumPy array containing the captured audio data
-                                for each frame, where each row represents one frame.
-        frames (int): The number of frames (block size) of the audio data captured.
-        time (CData): An instance of sounddevice._ffi.CData containing the timestamp of the first sample
-                      in 'indata'. The structure contains 'inputBufferAdcTime' and 'currentTime' attributes.
-        status (sounddevice.CallbackFlags): An instance of sounddevice.CallbackFlags indicating the status
-                                            of the audio input stream.
+    Speech frames are found with `detect_speech_frames` and widened by ``padding_ms`` on each side so word
+    onsets and tails are kept. Any remaining internal pause longer than ``max_pause_ms`` is collapsed to
+    ``max_pause_ms``. The whole selection is computed as a frame mask and applied with one boolean index.
+
+    Args:
+        samples (numpy.ndarray): 1-D int16 audio.
+        energy_threshold (float, optional): See `detect_speech_frames`. Defaults to 500.
+        zcr_threshold (float, optional): See `detect_speech_frames`. Defaults to 0.25.
+        frame_ms (int, optional): Analysis frame length in milliseconds. Defaults to 30.
+        padding_ms (int, optional): Audio kept around each speech region. Defaults to 200.
+        max_pause_ms (int, optional): Longest internal pause that is kept intact. Defaults to 800.
+
+    Returns:
+        numpy.ndarray: The trimmed int16 audio; empty if no speech was detected.
+    """
+    frame_length = int(RATE * frame_ms / 1000)
+    speech = detect_speech_frames(samples, frame_length, energy_threshold, zcr_threshold)
+    if not speech.any():
+        return samples[:0]
+
+    pad = int(padding_ms / frame_ms)
+    # "full" and slice rather than "same", which returns the longer of its inputs (the kernel, for short clips)
+    keep = np.convolve(speech, np.ones(2 * pad + 1), mode="full")[pad:pad + len(speech)] > 0
+
+    # Keep internal pauses, but collapse long ones to max_pause (half taken from each end of the pause).
+    max_pause = int(max_pause_ms / frame_ms)
+    edges = np.diff(np.concatenate(([1], keep.astype(np.int8), [1])))
+    pause_starts = np.flatnonzero(edges == -1)
+    pause_ends = np.flatnonzero(edges == 1)
+    first, last = np.flatnonzero(keep)[[0, -1]]
+    for start, end in zip(pause_starts, pause_ends):
+        if first < start and end <= last:
+            head = min(end - start, max_pause // 2)
+            tail = min(end - start, max_pause) - head
+            keep[start:start + head] = True
+            keep[end - tail:end] = True
+
+    sample_mask = np.repeat(keep, frame_length)[:len(samples)]
+    # Samples past the last whole frame follow that frame's decision.
+    sample_mask = np.concatenate((sample_mask, np.full(len(samples) - len(sample_mask), keep[-1])))
+    return samples[sample_mask]
+
+
+class VoiceActivityDetector:
+    """
+    Endpoints utterances in the audio captured by a ``ContinuousRecorder``.
+
+    Each call to ``process`` classifies the frames captured since the previous call and reports where
+    utterances start and end. An utterance ends once ``hangover_ms`` of silence follows speech, or when it
+    reaches ``max_utterance_seconds``; utterances shorter than ``min_utterance_ms`` are dropped as noise.
+
+    Args:
+        frame_ms (int, optional): Analysis frame length in milliseconds. Defaults to 30.
+        energy_threshold (float, optional): See ``detect_speech_frames``. Defaults to 500.
+        zcr_threshold (float, optional): See ``detect_speech_frames``. Defaults to 0.25.
+        hangover_ms (int, optional): Silence that closes an utterance, in milliseconds. Defaults to 700.
+        min_utterance_ms (int, optional): Shortest speech run that is reported. Defaults to 300.
+        max_utterance_seconds (float, optional): Longest utterance before it is force-closed.
+                                                 Defaults to MAX_UTTERANCE_SECONDS.
+    """
+
+    def __init__(self, frame_ms=30, energy_threshold=500, zcr_threshold=0.25, hangover_ms=700,
+                 min_utterance_ms=300, max_utterance_seconds=MAX_UTTERANCE_SECONDS):
+        self.frame_length = int(RATE * frame_ms / 1000)
+        self.energy_threshold = energy_threshold
+        self.zcr_threshold = zcr_threshold
+        self.hangover_frames = int(RATE * hangover_ms / 1000)
+        self.min_utterance_frames = int(RATE * min_utterance_ms / 1000)
+        self.max_utterance_seconds = max_utterance_seconds
+        self.max_utterance_frames = int(RATE * max_utterance_seconds)
+        self.reset()
+
+    def reset(self, position=0):
+        """Forget any utterance in progress and resume analysis at absolute frame ``position``."""
+        self.position = position
+        self.speech_start = None
+        self.last_speech_end = None
+
+    def process(self, ring):
+        """
+        Analyse the frames captured since the last call.
+
+        Args:
+            ring (AudioRingBuffer): The buffer being filled by the recorder.
+
+        Returns:
+            list: ``("start", frame)`` and ``("end", frame)`` events, in order, using absolute frame indices.
+        """
+        oldest = ring.frames_written - ring.capacity
+        if self.position < oldest:
+            # Fell behind the capture (e.g. while a previous utterance was being processed).
+            self.reset(oldest)
+        samples = ring.view(self.position)
+        speech = detect_speech_frames(samples, self.frame_length, self.energy_threshold, self.zcr_threshold)
+        events = []
+        for index in range(len(speech)):
+            frame_start = self.position + index * self.frame_length
+            frame_end = frame_start + self.frame_length
+            if speech[index]:
+                if self.speech_start is None:
+                    self.speech_start = frame_start
+                self.last_speech_end = frame_end
+            if self.speech_start is None:
+                continue
+            if frame_end - self.speech_start >= self.max_utterance_frames:
+                events.append(("start", self.speech_start))
+                events.append(("end", frame_end))
+                self.speech_start = None
+            elif frame_end - self.last_speech_end >= self.hangover_frames:
+                if self.last_speech_end - self.speech_start >= self.min_utterance_frames:
+                    events.append(("start", self.speech_start))
+                    events.append(("end", self.last_speech_end))
+                self.speech_start = None
+        self.position += len(speech) * self.frame_length
+        return events
+
+    def in_speech(self):
+        """Return True while an utterance is open (speech seen and not yet endpointed)."""
+        return self.speech_start is not None
+
+
+def record_until_stopped(max_duration, vad=None, stop_keys=(keyboard.Key.space, keyboard.Key.enter)):
+    """
+    Record a single utterance, returning as soon as it is over instead of after a fixed duration.
+
+    Recording stops at the first of: one of ``stop_keys`` being pressed, the ``vad`` detecting the end of
+    speech, or ``max_duration`` seconds elapsing.
+
+    Args:
+        max_duration (float): Upper bound on the recording length in seconds.
+        vad (VoiceActivityDetector, optional): Enables the silence endpoint. Defaults to None (stop key only).
+        stop_keys (tuple, optional): pynput keys that end the recording. Defaults to SPACE and ENTER.
+
+    Returns:
+        numpy.ndarray or None: The recorded int16 audio, or None if an error occurred during recording.
 
     Notes:
-        - The function modifies the global `audio_frames` list, appending new audio data if `is_recording` is True.
-        - Any important `status` flags are printed to the standard error stream to alert of issues like buffer overflows.
-        - This callback is designed to operate in the background, and its efficiency is crucial to avoid latency or
-          loss of audio data. Therefore, operations within the callback should be kept to a minimum.
-    """
-    global is_recording, audio_frames
-    if is_recording:
-        audio_frames.append(indata.copy())
-    if status:
-        print(status, file=sys.stderr)
-
-def start_recording():
-    """Starts the recording process by setting is_recording to True."""
-    global is_recording
-    is_recording = True
-
-def stop_recording():
-    """Stops the recording process by setting is_recording to False."""
-    global is_recording
-    is_recording = False
+        The stop key is also delivered to the terminal; callers reading stdin should discard pending input
+        afterwards (see `cli_interface.flush_input`).
+    """
+    # The key listener and (with a VAD) the audio callback post here; nothing wakes up otherwise
+    events = queue.SimpleQueue()
+
+    def on_press(key):
+        if key in stop_keys:
+            events.put("stop")
+            return False  # Stop listener
+
+    recorder = ContinuousRecorder(max_seconds=max_duration)
+    listener = keyboard.Listener(on_press=on_press)
+    try:
+        recorder.start()
+        listener.start()
+        recorder.begin_utterance()
+        if vad:
+            vad.reset(recorder.ring.frames_written)
+            recorder.on_block = lambda: events.put("audio")
+        while True:
+            try:
+                event = events.get(timeout=max(max_duration - recorder.elapsed(), 0))
+            except queue.Empty:
+                break  # max_duration reached
+            if event == "stop":
+                break
+            for vad_event, frame in vad.process(recorder.ring):
+                if vad_event == "end":
+                    return recorder.end_utterance(frame).copy()
+        return recorder.end_utterance().copy()
+    except Exception as e:
+        logging.error(f"Error during recording: {e}")
+        return None
+    finally:
+        listener.stop()
+        recorder.close()
+
 
 # Add more audio processing functions as needed
\ No newline at end of file
@@ -0,0 +1,160 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from tqdm import tqdm
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MANIFEST_PATH = os.path.join("Collections", "batch_manifest.jsonl")
+
+
+class ProviderLimiter:
+    """
+    Caps the number of concurrent requests per API provider, independently of the worker count.
+
+    Args:
+        limits (dict): Maximum concurrent requests per provider name, e.g. ``{"groq": 4, "openai": 8}``.
+                       Providers that are missing (or set to 0) are not limited.
+
+    Example:
+        with limiter.slot("groq"):
+            transcribe_audio(...)
+    """
+
+    def __init__(self, limits):
+        self._semaphores = {name: threading.BoundedSemaphore(limit) for name, limit in limits.items() if limit}
+
+    @contextmanager
+    def slot(self, provider):
+        semaphore = self._semaphores.get(provider)
+        if semaphore is None:
+            yield
+            return
+        with semaphore:
+            yield
+
+
+class BatchManifest:
+    """
+    Append-only JSONL record of how far each input file of a batch run has progressed.
+
+    Every update appends the file's full state (path, size, mtime, stage and any extra fields such as the
+    transcription or the output location), and the last line for a path wins when the manifest is loaded.
+    Appending one flushed line per update means an interrupted run loses at most the update in flight.
+    A record only applies while the file's size and mtime are unchanged, so edited files start over.
+    Superseded lines are dropped when the manifest is opened, so it holds one line per file between runs.
+
+    Args:
+        path (str): The manifest file. Created (with its directory) if needed.
+    """
+
+    def __init__(self, path=DEFAULT_MANIFEST_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        line_count = 0
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                for line in file:
+                    line_count += 1
+                    try:
+                        entry = json.loads(line)
+                        self._entries[entry["path"]] = entry
+                    except (ValueError, KeyError):
+                        continue  # a line cut short by a crash
+        if line_count > len(self._entries):
+            self._compact()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _compact(self):
+        """Rewrite the manifest with only the latest line per file (and without lines cut short by a crash)."""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            for entry in self._entries.values():
+                file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.path)  # atomic, so a crash leaves either the old or the new manifest
+
+    def lookup(self, file_path):
+        """Return the recorded state of ``file_path``, or None if it is unknown or has changed since."""
+        file_path = os.path.abspath(file_path)
+        entry = self._entries.get(file_path)
+        if entry is None:
+            return None
+        stat = os.stat(file_path)
+        if entry.get("size") != stat.st_size or entry.get("mtime") != stat.st_mtime:
+            return None
+        return entry
+
+    def record(self, file_path, stage, **fields):
+        """Record that ``file_path`` reached ``stage``, merging ``fields`` into its previous state."""
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        with self._lock:
+            entry = dict(self.lookup(file_path) or {})
+            entry.update(fields)
+            entry.update(path=file_path, size=stat.st_size, mtime=stat.st_mtime, stage=stage, updated=time.time())
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._file.flush()
+            self._entries[file_path] = entry
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def batch_settings(config):
+    """
+    Read the optional `batch` section of config.yaml.
+
+    Returns:
+        tuple: ``(workers, ProviderLimiter, manifest_path)``.
+    """
+    batch = (config or {}).get("batch") or {}
+    limiter = ProviderLimiter({
+        "groq": batch.get("groq_concurrency", 4),
+        "openai": batch.get("openai_concurrency", 4),
+    })
+    return max(int(batch.get("workers", 8)), 1), limiter, batch.get("manifest", DEFAULT_MANIFEST_PATH)
+
+
+def run_batch(items, func, workers=8, description="Processing"):
+    """
+    Apply ``func`` to every item on a thread pool, showing progress with throughput and ETA.
+
+    Results are yielded in the order of ``items``, not in completion order, so anything the caller writes
+    for each result happens in a deterministic order. An exception raised by ``func`` is logged and
+    reported as a None result for that item. If the caller stops early (an exception, Ctrl+C or closing the
+    generator), items that have not started are cancelled and only the running ones are waited for.
+
+    Args:
+        items (list): The inputs, in the order results should be delivered.
+        func (callable): Called with one item; runs on a worker thread.
+        workers (int, optional): The size of the thread pool. Defaults to 8.
+        description (str, optional): The progress bar label. Defaults to "Processing".
+
+    Yields:
+        tuple: ``(item, result)`` pairs in input order.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool, tqdm(total=len(items), desc=description, unit="file") as progress:
+        futures = []
+        for item in items:
+            future = pool.submit(func, item)
+            future.add_done_callback(lambda _: progress.update(1))
+            futures.append(future)
+        try:
+            for item, future in zip(items, futures):
+                try:
+                    yield item, future.result()
+                except Exception as e:
+                    logger.error(f"Failed to process {item}: {e}")
+                    yield item, None
+        finally:
+            # On Ctrl+C or a failure in the caller's loop, drop the queued items; only those running are awaited
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,329 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join("Collections", "cache.sqlite")
+DEFAULT_TTS_CACHE_DIR = os.path.join("Collections", "tts_cache")
+
+
+def cache_key(*parts):
+    """
+    Build a stable cache key from several parts (prompt, model, text, ...).
+
+    The parts are length-prefixed before hashing, so ("ab", "c") and ("a", "bc") produce different keys.
+
+    Returns:
+        str: A hex SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode("utf-8")
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def normalize_text(text):
+    """Normalize text for cache lookups: Unicode NFKC, case-folded, with whitespace collapsed."""
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def _size_of(value):
+    return len(value) if isinstance(value, bytes) else len(str(value).encode("utf-8"))
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache bounded by entry count, with optional expiry.
+
+    Args:
+        max_entries (int, optional): Entries kept before the least recently used is evicted. Defaults to 1024.
+        ttl (float, optional): Seconds an entry stays valid after it is stored. Defaults to None (no expiry).
+    """
+
+    def __init__(self, max_entries=1024, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                value, expires = self._items[key]
+                if expires is None or expires > time.monotonic():
+                    self._items.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._items[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = (value, time.monotonic() + self.ttl if self.ttl else None)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+
+class SQLiteCache:
+    """
+    Persistent key/value cache in an SQLite table, bounded by the total size of the stored values.
+
+    When a ``put`` pushes the table over ``max_bytes``, the least recently read or written entries are
+    deleted until it fits again.
+
+    Args:
+        path (str): The database file. Its directory is created if needed.
+        table (str): The table holding this cache, so several caches can share one file.
+        max_bytes (int, optional): Size budget for the stored values. Defaults to 64 MB.
+    """
+
+    def __init__(self, path, table, max_bytes=64 * 1024 * 1024):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.table = table
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.total_bytes = self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table}").fetchone()[0]
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(f"SELECT value FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, value):
+        size = _size_of(value)
+        with self._lock:
+            old = self._conn.execute(f"SELECT size FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time()),
+            )
+            self.total_bytes += size - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                f"SELECT key, size FROM {self.table} ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self.total_bytes -= size
+                if self.total_bytes <= self.max_bytes:
+                    break
+
+    def stats(self):
+        return f"{self.hits} hits / {self.misses} misses ({self.total_bytes:,} bytes)"
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class TwoTierCache:
+    """
+    An `LRUCache` in front of an `SQLiteCache`. Disk hits are promoted to memory.
+
+    Args:
+        memory (LRUCache): The in-process tier.
+        disk (SQLiteCache, optional): The persistent tier. Defaults to None (memory only).
+    """
+
+    def __init__(self, memory, disk=None):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.put(key, value)
+        return value
+
+    def put(self, key, value):
+        self.memory.put(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.put(key, value)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not persist cache entry: {e}")
+
+    def stats(self):
+        """Return a one-line summary of hits and misses per tier."""
+        summary = f"memory {self.memory.hits} hits / {self.memory.misses} misses"
+        if self.disk is not None:
+            summary += f", disk {self.disk.hits} hits / {self.disk.misses} misses ({self.disk.total_bytes:,} bytes)"
+        return summary
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+
+
+class FileBlobStore:
+    """
+    Content-addressed store of files on disk, bounded by total size with least-recently-used eviction.
+
+    Each blob lives at ``<directory>/<key>.<extension>``, so it can be handed to anything that plays or
+    reads a path. Reads refresh the file's modification time, which is what eviction orders by.
+
+    Args:
+        directory (str): Where the blobs are stored. Created if needed.
+        max_bytes (int, optional): Size budget. Defaults to 256 MB.
+        extension (str, optional): File extension of the blobs. Defaults to "wav".
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024, extension="wav"):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._sizes = {}
+        for entry in os.scandir(directory):
+            if entry.is_file() and entry.name.endswith(f".{extension}"):
+                self._sizes[entry.path] = entry.stat().st_size
+            elif entry.is_file() and ".part-" in entry.name:
+                os.remove(entry.path)  # left over from an interrupted write
+        self.total_bytes = sum(self._sizes.values())
+
+    def path_for(self, key):
+        return os.path.join(self.directory, f"{key}.{self.extension}")
+
+    def get(self, key):
+        """Return the path of the blob for ``key``, or None if it is not stored."""
+        path = self.path_for(key)
+        with self._lock:
+            if path in self._sizes and os.path.exists(path):
+                os.utime(path)
+                self.hits += 1
+                return path
+            self._sizes.pop(path, None)
+            self.misses += 1
+            return None
+
+    def temp_path(self, key):
+        """A private path to write a new blob to before it is published with ``commit``."""
+        return f"{self.path_for(key)}.part-{threading.get_ident()}"
+
+    def commit(self, key, temp_path):
+        """Atomically publish a completely written ``temp_path`` as the blob for ``key`` and return its path."""
+        path = self.path_for(key)
+        size = os.path.getsize(temp_path)
+        with self._lock:
+            os.replace(temp_path, path)
+            self.total_bytes += size - self._sizes.get(path, 0)
+            self._sizes[path] = size
+            self._evict(keep=path)
+        return path
+
+    def _evict(self, keep):
+        if self.total_bytes <= self.max_bytes:
+            return
+        by_age = sorted(self._sizes, key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+        for path in by_age:
+            if self.total_bytes <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.total_bytes -= self._sizes.pop(path)
+
+    def stats(self):
+        return f"{self.hits} hits / {self.misses} misses ({self.total_bytes:,} bytes)"
+
+
+def open_tts_cache(config):
+    """
+    Create the synthesized speech store from the optional `cache` section of config.yaml.
+
+    Returns:
+        FileBlobStore or None: None when caching is disabled.
+    """
+    settings = (config or {}).get("cache") or {}
+    if not settings.get("enabled", True):
+        return None
+    return FileBlobStore(
+        settings.get("tts_dir", DEFAULT_TTS_CACHE_DIR),
+        int(settings.get("tts_disk_mb", 256) * 1024 * 1024),
+        extension="wav",
+    )
+
+
+def open_translation_cache(config):
+    """
+    Create the translation cache from the optional `cache` section of config.yaml.
+
+    Returns:
+        TwoTierCache or None: None when caching is disabled.
+    """
+    settings = (config or {}).get("cache") or {}
+    if not settings.get("enabled", True):
+        return None
+    memory = LRUCache(settings.get("translation_memory_entries", 1024))
+    try:
+        disk = SQLiteCache(
+            settings.get("path", DEFAULT_CACHE_PATH),
+            "translations",
+            int(settings.get("translation_disk_mb", 64) * 1024 * 1024),
+        )
+    except sqlite3.Error as e:
+        logger.warning(f"Translation cache on disk unavailable, using memory only: {e}")
+        disk = None
+    return TwoTierCache(memory, disk)
+
+
+def open_transcription_cache(config):
+    """
+    Create the persistent transcription cache from the optional `cache` section of config.yaml.
+
+    Returns:
+        SQLiteCache or None: None when caching is disabled or the database cannot be opened.
+    """
+    settings = (config or {}).get("cache") or {}
+    if not settings.get("enabled", True):
+        return None
+    try:
+        return SQLiteCache(
+            settings.get("path", DEFAULT_CACHE_PATH),
+            "transcriptions",
+            int(settings.get("transcription_disk_mb", 64) * 1024 * 1024),
+        )
+    except sqlite3.Error as e:
+        logger.warning(f"Transcription cache unavailable: {e}")
+        return None
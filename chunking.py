@@ -0,0 +1,137 @@
+import logging
+import re
+import numpy as np
+from audio_codec import RATE, stream_pcm
+
+logger = logging.getLogger(__name__)
+
+# Defaults, overridable from the `chunking` section of config.yaml via `chunk_settings`
+SEARCH_SECONDS = 10.0  # how far before the target length to look for a pause
+OVERLAP_SECONDS = 1.0  # audio repeated at the start of the next chunk
+FRAME_MS = 30
+READ_SECONDS = 30  # size of the windows read from the decoder
+MAX_OVERLAP_WORDS = 12
+
+
+def chunk_settings(config):
+    """
+    Read the optional `chunking` section of config.yaml.
+
+    Returns:
+        tuple: ``(chunk_seconds, search_seconds, overlap_seconds)``. ``chunk_seconds`` is None unless set,
+        meaning chunks are only limited by the upload size.
+    """
+    chunking = (config or {}).get("chunking") or {}
+    chunk_seconds = chunking.get("chunk_seconds")
+    return (
+        float(chunk_seconds) if chunk_seconds else None,
+        float(chunking.get("search_seconds", SEARCH_SECONDS)),
+        float(chunking.get("overlap_seconds", OVERLAP_SECONDS)),
+    )
+
+
+def quietest_frame(samples, frame_length):
+    """
+    Return the sample offset of the center of the quietest stretch of ``samples``.
+
+    Energy is measured per frame and smoothed over three frames, so a single quiet frame inside a word
+    loses to a real pause.
+    """
+    frame_count = len(samples) // frame_length
+    if frame_count == 0:
+        return len(samples)
+    frames = samples[:frame_count * frame_length].reshape(frame_count, frame_length).astype(np.float32)
+    energy = np.mean(frames * frames, axis=1)
+    if frame_count >= 3:
+        energy = np.convolve(energy, np.ones(3) / 3, mode="same")
+    return int(np.argmin(energy)) * frame_length + frame_length // 2
+
+
+def aligned_chunks(windows, chunk_frames, search_frames, overlap_frames=0, frame_length=RATE * FRAME_MS // 1000):
+    """
+    Regroup a stream of sample windows into chunks that end in the quietest spot near the target length.
+
+    Each cut is placed in the ``search_frames`` before ``chunk_frames``, so no chunk is ever longer than
+    ``chunk_frames`` (which matters when that length is derived from an upload size limit). The next chunk
+    starts ``overlap_frames`` before the cut, so a word clipped by a bad cut is heard whole at least once;
+    `stitch_transcripts` removes the text the overlap duplicates.
+
+    Args:
+        windows (iterable): 1-D int16 sample windows, e.g. from `audio_codec.stream_pcm`.
+        chunk_frames (int): The maximum chunk length.
+        search_frames (int): How far before ``chunk_frames`` a cut may be placed. Capped at half a chunk.
+        overlap_frames (int, optional): Samples shared by consecutive chunks. Capped at a quarter chunk.
+                                        Defaults to 0.
+        frame_length (int, optional): Samples per energy frame. Defaults to 30 ms.
+
+    Yields:
+        numpy.ndarray: Chunks, copied out of the working buffer.
+    """
+    search_frames = min(search_frames, chunk_frames // 2)
+    overlap_frames = min(overlap_frames, chunk_frames // 4)
+    buffer = np.empty(chunk_frames, dtype=np.int16)
+    filled = 0
+    carried = 0  # overlap at the start of the buffer that was already part of the previous chunk
+    for window in windows:
+        while len(window):
+            if filled == chunk_frames:  # only cut once there is audio beyond the full buffer
+                search_start = chunk_frames - search_frames
+                cut = search_start + quietest_frame(buffer[search_start:], frame_length)
+                yield buffer[:cut].copy()
+                tail = buffer[cut - overlap_frames:].copy()
+                buffer[:len(tail)] = tail
+                filled, carried = len(tail), overlap_frames
+            taken = min(len(window), chunk_frames - filled)
+            buffer[filled:filled + taken] = window[:taken]
+            filled += taken
+            window = window[taken:]
+    if filled > carried:
+        yield buffer[:filled].copy()
+
+
+def silence_aligned_chunks(path, chunk_frames, search_frames, overlap_frames=0, rate=RATE):
+    """
+    Stream-decode ``path`` into silence-aligned chunks (see `aligned_chunks`) with flat memory use.
+
+    Raises:
+        OSError: If the file cannot be decoded.
+    """
+    windows = stream_pcm(path, min(READ_SECONDS * rate, chunk_frames), rate)
+    return aligned_chunks(windows, chunk_frames, search_frames, overlap_frames, rate * FRAME_MS // 1000)
+
+
+def _word_key(word):
+    return re.sub(r"[^\w]", "", word.casefold())
+
+
+def stitch_transcripts(texts, separator=" ", max_overlap_words=MAX_OVERLAP_WORDS):
+    """
+    Join chunk transcriptions, dropping words the next chunk repeats from the end of the previous one.
+
+    The longest run of up to ``max_overlap_words`` words that ends the previous text and starts the next
+    is removed from the next text. Words are compared case-insensitively without punctuation, so
+    "world." matches "World". Texts without a repeated run are joined unchanged.
+
+    Args:
+        texts (list): Transcriptions in chunk order. Empty entries are skipped.
+        separator (str, optional): Placed between texts. Defaults to " ".
+        max_overlap_words (int, optional): The longest run considered. Defaults to MAX_OVERLAP_WORDS.
+
+    Returns:
+        str: The joined transcription.
+    """
+    stitched = []
+    previous_keys = []
+    for text in texts:
+        words = (text or "").split()
+        if not words:
+            continue
+        keys = [_word_key(word) for word in words]
+        for length in range(min(max_overlap_words, len(keys), len(previous_keys)), 0, -1):
+            if keys[:length] == previous_keys[-length:] and any(keys[:length]):
+                words, keys = words[length:], keys[length:]
+                break
+        if words:
+            stitched.append(" ".join(words))
+            previous_keys = keys
+    return separator.join(stitched)
@@ -1,3 +1,4 @@
+import sys
 import readchar
 from colorama import Fore, Style
 
@@ -63,4 +64,24 @@ def single_run_input_loop():
     )
     return readchar.readkey()
 
+def flush_input():
+    """
+    Discards keystrokes waiting in the terminal input buffer.
+
+    Keys pressed while another component is listening (e.g. the stop key during recording) would
+    otherwise be read by the next prompt.
+    """
+    try:
+        import msvcrt
+
+        while msvcrt.kbhit():
+            msvcrt.getwch()
+    except ImportError:
+        import termios
+
+        try:
+            termios.tcflush(sys.stdin, termios.TCIFLUSH)
+        except (termios.error, ValueError):
+            pass  # stdin is not a terminal
+
 # Add more CLI-related functions as needed
\ No newline at end of file
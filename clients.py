@@ -0,0 +1,39 @@
+import threading
+import http_client
+
+# SDK clients are built on first use, and their packages (groq, openai, httpx) imported only then,
+# so modes that never call an API pay nothing for them at startup.
+_clients = {}
+_lock = threading.Lock()
+
+
+def _client_options():
+    """The SDK clients keep their own pooled connections; give them the same timeouts and retry budget."""
+    import httpx
+
+    return {
+        "timeout": httpx.Timeout(http_client.READ_TIMEOUT, connect=http_client.CONNECT_TIMEOUT),
+        "max_retries": http_client.MAX_RETRIES,
+    }
+
+
+def _get(name, api_key, factory):
+    with _lock:
+        client = _clients.get((name, api_key))
+        if client is None:
+            client = _clients[(name, api_key)] = factory(api_key=api_key, **_client_options())
+        return client
+
+
+def get_groq_client(api_key):
+    """Return the process-wide Groq client for ``api_key``, creating it on the first call."""
+    from groq import Groq
+
+    return _get("groq", api_key, Groq)
+
+
+def get_openai_client(api_key):
+    """Return the process-wide OpenAI client for ``api_key``, creating it on the first call."""
+    from openai import OpenAI
+
+    return _get("openai", api_key, OpenAI)
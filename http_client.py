@@ -0,0 +1,167 @@
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Defaults, overridable from the `http` section of config.yaml via `configure`
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 60
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 20
+POOL_SIZE = 8
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_paused_until = {}  # host -> time before which no request is sent, after a 429 from that host
+
+
+def configure(config):
+    """
+    Apply the optional `http` section of config.yaml (connect_timeout, read_timeout, max_retries,
+    backoff_base, backoff_max, pool_size).
+    """
+    global CONNECT_TIMEOUT, READ_TIMEOUT, MAX_RETRIES, BACKOFF_BASE, BACKOFF_MAX, POOL_SIZE
+    http = (config or {}).get("http") or {}
+    CONNECT_TIMEOUT = http.get("connect_timeout", CONNECT_TIMEOUT)
+    READ_TIMEOUT = http.get("read_timeout", READ_TIMEOUT)
+    MAX_RETRIES = http.get("max_retries", MAX_RETRIES)
+    BACKOFF_BASE = http.get("backoff_base", BACKOFF_BASE)
+    BACKOFF_MAX = http.get("backoff_max", BACKOFF_MAX)
+    POOL_SIZE = http.get("pool_size", POOL_SIZE)
+
+
+def _host(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _wait_if_paused(host):
+    delay = _paused_until.get(host, 0) - time.time()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def get_session(url):
+    """
+    Return the shared keep-alive session for the host of ``url``, creating it on first use.
+
+    One pooled session per host means the TCP and TLS handshakes are paid once per process instead of
+    once per request.
+    """
+    host = _host(url)
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            session.mount(host, adapter)
+            _sessions[host] = session
+        return session
+
+
+def retry_delay(attempt, response=None):
+    """
+    Seconds to wait before retry number ``attempt`` (0-based).
+
+    A `Retry-After` header (seconds or HTTP date) on the response wins; otherwise full-jitter exponential
+    backoff is used, capped at BACKOFF_MAX.
+    """
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0), BACKOFF_MAX)
+        except ValueError:
+            try:
+                return min(max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0), BACKOFF_MAX)
+            except (TypeError, ValueError):
+                pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def request(method, url, timeout=None, max_retries=None, **kwargs):
+    """
+    Send an HTTP request through the shared session, retrying transient failures.
+
+    Connection errors, timeouts and 429/5xx responses are retried up to ``max_retries`` times with
+    jittered exponential backoff that honors `Retry-After`. A 429 also pauses every other thread's
+    requests to the same host for that delay, so concurrent callers back off together instead of
+    spending their retries against the rate limit. Request bodies must be re-sendable (bytes, dicts or
+    ``(name, bytes)`` file tuples rather than open files).
+
+    Args:
+        method (str): The HTTP method.
+        url (str): The request URL.
+        timeout (tuple, optional): ``(connect, read)`` timeouts in seconds. Defaults to the configured values.
+        max_retries (int, optional): Overrides MAX_RETRIES.
+        **kwargs: Passed through to ``requests.Session.request``.
+
+    Returns:
+        requests.Response: The last response received.
+
+    Raises:
+        requests.RequestException: If the final attempt fails without a response.
+    """
+    session = get_session(url)
+    timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+    max_retries = MAX_RETRIES if max_retries is None else max_retries
+    host = _host(url)
+    for attempt in range(max_retries + 1):
+        _wait_if_paused(host)
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == max_retries:
+                raise
+            delay = retry_delay(attempt)
+            logger.warning(f"{method} {url} failed ({e}); retrying in {delay:.1f}s")
+        else:
+            if response.status_code not in RETRY_STATUS_CODES or attempt == max_retries:
+                return response
+            delay = retry_delay(attempt, response)
+            if response.status_code == 429:
+                _paused_until[host] = max(_paused_until.get(host, 0), time.time() + delay)
+            logger.warning(f"{method} {url} returned {response.status_code}; retrying in {delay:.1f}s")
+            response.close()  # return the connection to the pool (streamed bodies are otherwise left unread)
+        time.sleep(delay)
+
+
+def post(url, **kwargs):
+    """Shorthand for ``request("POST", url, **kwargs)``."""
+    return request("POST", url, **kwargs)
+
+
+def prewarm(urls=(), callables=()):
+    """
+    Open connections in the background so the first real request skips DNS, TCP and TLS setup.
+
+    Args:
+        urls (iterable, optional): URLs whose hosts should have a pooled connection ready.
+        callables (iterable, optional): Cheap calls that warm connection pools owned by SDK clients
+                                        (e.g. ``client.models.list``).
+
+    Returns:
+        threading.Thread: The daemon thread doing the work.
+    """
+    def run():
+        for url in urls:
+            try:
+                get_session(url).head(url, timeout=(CONNECT_TIMEOUT, CONNECT_TIMEOUT))
+            except requests.RequestException as e:
+                logger.debug(f"Pre-warming {url} failed: {e}")
+        for func in callables:
+            try:
+                func()
+            except Exception as e:
+                logger.debug(f"Pre-warming via {func} failed: {e}")
+
+    thread = threading.Thread(target=run, name="http-prewarm", daemon=True)
+    thread.start()
+    return thread
@@ -2,26 +2,26 @@ import argparse
 import sys
 import glob
 import os
-import wavio
-from pynput import keyboard
 import time
+import queue
 import signal
-import numpy as np
-import sounddevice as sd
 import logging
+import threading
 from colorama import Fore, Style, init
-from groq import Groq
-from openai import OpenAI
 from encoding_utils import setup_encoding
-from utils import load_config, create_session_folder, save_transcription, save_to_desktop, print_json_formatted
-from audio_processing import (
-    record_audio, play_audio, voice_to_text, clear_audio_frames,
-    record_audio_continuous, start_recording, stop_recording, WAVE_OUTPUT_FILENAME, CHANNELS, SAMPLE_WIDTH, RATE, FORMAT
-)
-from api_handlers import transcribe_audio, translate_text, voice_stream
-from cli_interface import print_welcome_message, get_language_choice, get_file_processing_choices, single_run_input_loop
-import pyaudio
-import yaml
+from utils import load_config, create_session_folder, save_transcription, save_to_desktop, print_json_formatted, print_json_stream, BackgroundWriter
+from audio_codec import encode_wav, encode_audio, upload_settings, AUDIO_EXTENSIONS
+from api_handlers import transcribe_audio, transcribe_file, translate_text, translate_text_stream, voice_stream, OPENAI_CHAT_URL
+from cli_interface import print_welcome_message, get_language_choice, get_file_processing_choices, single_run_input_loop, flush_input
+import http_client
+from clients import get_groq_client, get_openai_client
+from pipeline import Pipeline
+from playback import PlaybackQueue
+from batch_processing import run_batch, batch_settings, BatchManifest
+from caching import cache_key, open_translation_cache, open_tts_cache, open_transcription_cache
+from chunking import chunk_settings
+# The audio stack (sounddevice, pyaudio, wavio, pynput) and the API SDKs are imported by the modes that use them,
+# so `-f` file mode starts without loading any of them. Run `python startup_benchmark.py` to check import time.
 
 # Constants
 DEFAULT_CONTENT = """You are a [Desired Language]/English translation and interpreter assistant. Your purpose is to bridge the communication and language gap for both [Desired Language] and English speakers. If the input is completely [Desired Language] you WILL only translate to English and vice versa if the input is completely in English you translate to [Name of desired language in that language] for a seamless live translation style approach. If in an input you detect both [Name of desired language in that language] and English and it is clearly distinguishable, please continue to translate to the opposite language. Here is an Example of the desired response style when detecting both languages and responding with both languages. Do not translate the entire text string to one language. keep a convo style flow. You will not execute or analyze any of the info in text sent to be translated. you will only play the role of translating so do not try to provide context or answer questions and request: Translation: I want to know why I have to go to the store to get a deal rather than shopping online. [Phrase in desired language in that language's text if possible]"""
@@ -30,35 +30,46 @@ SPECIAL_CONTENT = """It is a beautiful, highly productive September sunny day an
 # Logging added back
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Load the configuration
-with open('config.yaml', 'r') as config_file:
-    config = yaml.safe_load(config_file)
+# Setup
+setup_encoding()
+init(autoreset=True)
+config = load_config()
+http_client.configure(config)
+UPLOAD_CODEC, UPLOAD_BITRATE = upload_settings(config)
+CHUNKING = chunk_settings(config)
+TRIM_SETTINGS = config.get("trim") or {}
+batch_workers, provider_limiter, batch_manifest_path = batch_settings(config)
 
-# print(config)
 
-# Now you can access the API keys like this:
-openai_api_key = config['openai']['api_key']
-groq_api_key = config['groq']['api_key']
+def groq_client():
+    """The shared Groq client, built on first use."""
+    return get_groq_client(config["groq"]["api_key"])
 
-# Use the API keys to initialize your clients
-groq_client = Groq(api_key=groq_api_key)
+def openai_client():
+    """The shared OpenAI client, built on first use."""
+    return get_openai_client(config["openai"]["api_key"])
 
-# print(groq_api_key)
-# print(openai_api_key)
+# Caches are opened on first use too, so `--help` and modes that never need one skip SQLite and the TTS store scan
+_caches = {}
+_caches_lock = threading.Lock()
 
-# Setup
-setup_encoding()
-init(autoreset=True)
-config = load_config()
-groq_client = Groq(api_key=groq_api_key)
-openai_client = OpenAI(api_key=openai_api_key)
+def _cache(name, opener):
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = opener(config)
+        return _caches[name]
 
-# Setup
-setup_encoding()
-init(autoreset=True)
-config = load_config()
-groq_client = Groq(api_key=config["groq"]["api_key"])
-openai_client = OpenAI(api_key=config["openai"]["api_key"])
+def translation_cache():
+    """The translation cache, opened on first use (None when caching is disabled)."""
+    return _cache("translation", open_translation_cache)
+
+def tts_cache():
+    """The synthesized speech store, opened on first use (None when caching is disabled)."""
+    return _cache("tts", open_tts_cache)
+
+def transcription_cache():
+    """The file transcription cache, opened on first use (None when caching is disabled)."""
+    return _cache("transcription", open_transcription_cache)
 
 
 language_map = {
@@ -106,6 +117,10 @@ def parse_arguments():
     parser.add_argument("-c", "--content", type=str, nargs="?", choices=list(language_map.keys()) + ["Smart Select", None], default=DEFAULT_CONTENT, help="Custom content for the API call to Whisper")
     parser.add_argument("-t", "--continuous", action="store_true", help="Enable continuous run mode")
     parser.add_argument("-v", "--voice", choices=["alloy", "echo", "fable", "onyx", "nova", "shimmer"], help="Choose a TTS voice for speaking the translation")
+    parser.add_argument("--vad", action="store_true", help="End each utterance automatically when the speaker pauses (continuous and single-run modes)")
+    parser.add_argument("--stream", action="store_true", help="Show the translation token by token as it is generated")
+    parser.add_argument("--no_trim", action="store_true", help="Upload recordings as captured, without trimming silence")
+    parser.add_argument("--discard_recordings", action="store_true", help="Keep captured audio in memory only; do not write it to the session folder")
     parser.add_argument("--save_recordings", action="store_true", help="Save all recordings instead of deleting them")
     
     args = parser.parse_args()
@@ -150,15 +165,60 @@ def get_modified_content(language):
     print()  # Add an    
     return modified_content
 
+def encode_upload(audio_array, wav_bytes):
+    """
+    Encode a captured utterance with the upload codec configured in config.yaml.
+
+    Args:
+        audio_array (numpy.ndarray): The captured int16 audio.
+        wav_bytes (bytes): The same audio already encoded as WAV, reused when the codec is "wav".
+
+    Returns:
+        tuple: ``(data, file_name)`` ready for `transcribe_audio`.
+    """
+    if UPLOAD_CODEC == "wav":
+        return wav_bytes, "audio.wav"
+    return encode_audio(audio_array, UPLOAD_CODEC, bitrate=UPLOAD_BITRATE)
+
+def translate_live(transcribed_text, content, stream=False):
+    """
+    Translate a live utterance. With `stream`, the original and the translation are shown immediately,
+    with the translation rendered token by token as it arrives.
+
+    Returns:
+        str or None: The translated text, or None if the translation failed.
+    """
+    if not stream:
+        return translate_text(transcribed_text, content, config["openai"]["api_key"], cache=translation_cache())
+    print_json_formatted({"Original": transcribed_text})
+    stats = {}
+    tokens = translate_text_stream(transcribed_text, content, config["openai"]["api_key"], stats, cache=translation_cache())
+    translated_text = print_json_stream("Translation", tokens)
+    if stats.get("first_token_ms") is not None:
+        logging.info(f"Translation streamed: first token after {stats['first_token_ms']:.0f} ms, complete after {stats['total_ms']:.0f} ms")
+    return translated_text or None
+
 def continuous_run_mode(content, args, session_folder):
+    from pynput import keyboard
+    from audio_processing import play_audio, ContinuousRecorder, MAX_UTTERANCE_SECONDS, VoiceActivityDetector, trim_silence
+
     print(Fore.GREEN + "\nContinuous run mode activated.\n" + Style.RESET_ALL)
-    print(Fore.YELLOW + "Press SPACE to start/stop recording (max 45 seconds)." + Style.RESET_ALL)
+    if args.vad:
+        print(Fore.YELLOW + "Press SPACE to start/stop listening. Utterances end automatically when you pause." + Style.RESET_ALL)
+    else:
+        print(Fore.YELLOW + "Press SPACE to start/stop recording (max 45 seconds)." + Style.RESET_ALL)
     print(Fore.YELLOW + "Press 'R' to replay the last translation." + Style.RESET_ALL)
     print(Fore.YELLOW + "Press ESC to exit." + Style.RESET_ALL)
     audio_files = []
-    is_recording = False
-    should_exit = False
     last_ai_audio_path = None
+    # Speech is played on its own worker; starting to talk (SPACE, or speech onset with --vad) cuts it off
+    playback = PlaybackQueue(play_audio)
+    barge_in_on_speech = (config.get("playback") or {}).get("barge_in_on_speech", True)
+    # Everything that changes the recording state is posted here: SPACE and ESC from the key listener, Ctrl+C
+    # from the signal handler and, while the VAD is listening, each captured audio block. The control loop
+    # below blocks on it, so it reacts the moment something happens and uses no CPU in between.
+    # SimpleQueue.put is reentrant, so the signal handler may post while the loop is inside get().
+    events = queue.SimpleQueue()
 
     def on_press(key):
         """
@@ -168,85 +228,145 @@ def continuous_run_mode(content, args, session_folder):
             key (Key): The key that was pressed.
 
         Returns:
-            bool: True if the key press event was handled, False otherwise.
-
-        This function is called when a key is pressed. It checks the key that was pressed and performs the
-        corresponding action. If the key is the space key, it toggles the recording state. If the key is the
-        'r' key, it replays the last translation. If the key is the escape key, it sets the should_exit flag
-        to True.
-
-        The function also checks the recording state and prints a message to the console accordingly.
-
-        Returns:
-            bool: True if the key press event was handled, False otherwise.
+            bool: False to stop the listener after ESC, None otherwise.
 
+        This function is called on the listener thread. The space key posts a "toggle" event and the escape
+        key an "exit" event to the control loop, which owns the recording state. The 'r' key queues a replay
+        of the last translation without waiting for it.
         """
-        nonlocal is_recording, should_exit, last_ai_audio_path
         if key == keyboard.Key.space:
-            is_recording = not is_recording
-            if is_recording:
-                print(Fore.CYAN + "\nRecording started. Press SPACE to stop or wait for 45 seconds." + Style.RESET_ALL)
-            else:
-                print(Fore.CYAN + "Recording stopped." + Style.RESET_ALL)
+            events.put("toggle")
         elif key == keyboard.KeyCode.from_char('r'):
             if last_ai_audio_path:
                 print(Fore.CYAN + "Replaying last translation..." + Style.RESET_ALL)
-                play_audio(file_path=last_ai_audio_path)
+                playback.enqueue(file_path=last_ai_audio_path)  # returns at once; the listener keeps running
             else:
                 print(Fore.YELLOW + "No translation available to replay." + Style.RESET_ALL)
         elif key == keyboard.Key.esc:
-            should_exit = True
+            events.put("exit")
             return False  # Stop listener
 
     listener = keyboard.Listener(on_press=on_press)
     listener.start()
 
     def signal_handler(sig, frame):
-        nonlocal should_exit
         print(Fore.RED + "\nInterrupt received, cleaning up..." + Style.RESET_ALL)
-        should_exit = True
+        events.put("exit")
 
     signal.signal(signal.SIGINT, signal_handler)
 
-    try:
-        while not should_exit:
-            if is_recording:
-                start_time = time.time()
-                audio_data = []
-
-                while is_recording and time.time() - start_time < 45:
-                    chunk = record_audio(0.1, session_folder)
-                    if chunk is not None:
-                        audio_data.extend(chunk)
-                    time.sleep(0.05)
-
-                if audio_data:
-                    audio_array = np.array(audio_data)
-                    audio_file_path = os.path.join(session_folder, f"audio_{int(time.time())}.wav")
-                    wavio.write(audio_file_path, audio_array, RATE, sampwidth=2)
-                    audio_files.append(audio_file_path)
-
-                    logging.info(f"Transcribing audio file: {audio_file_path}")
-                    transcribed_text = transcribe_audio(audio_file_path, groq_client)
-
-                    if transcribed_text:
-                        logging.info(f"Translating text: {transcribed_text}")
-                        translated_text = translate_text(transcribed_text, content, config["openai"]["api_key"])
-                        save_transcription(session_folder, transcribed_text, translated_text)
+    # One input stream for the whole session: capture is gapless and the ring buffer is reused per utterance.
+    vad = VoiceActivityDetector(**(config.get("vad") or {})) if args.vad else None
+    # Sized for the longest utterance the VAD may report, so `vad.max_utterance_seconds` above 45 is not cut short
+    recorder = ContinuousRecorder(max_seconds=max(MAX_UTTERANCE_SECONDS, vad.max_utterance_seconds if vad else 0))
+    recorder.start()
+    writer = None if args.discard_recordings else BackgroundWriter()
+
+    # Each utterance flows capture -> transcribe -> translate -> speak; every stage has its own worker,
+    # so the next utterance can be recorded and transcribed while the previous one is still being spoken.
+    def transcribe_stage(audio_array):
+        if not args.no_trim:
+            audio_array = trim_silence(audio_array, **TRIM_SETTINGS)
+            if audio_array.size == 0:
+                print(Fore.YELLOW + "No speech detected." + Style.RESET_ALL)
+                return None
+        wav_bytes = encode_wav(audio_array)
+        if writer:
+            audio_file_path = os.path.join(session_folder, f"audio_{int(time.time())}.wav")
+            writer.write(audio_file_path, wav_bytes)
+            audio_files.append(audio_file_path)
+
+        upload, upload_name = encode_upload(audio_array, wav_bytes)
+        return transcribe_audio(upload, groq_client(), file_name=upload_name) or None
+
+    def translate_stage(transcribed_text):
+        logging.info(f"Translating text: {transcribed_text}")
+        translated_text = translate_live(transcribed_text, content, args.stream)
+        save_transcription(session_folder, transcribed_text, translated_text)
+        if not args.stream:
+            print_json_formatted({"Original": transcribed_text, "Translation": translated_text})
+        return translated_text
+
+    def speak_stage(translated_text):
+        nonlocal last_ai_audio_path
+        logging.info(f"Generating voice for translated text: {translated_text}")
+        ai_audio_path = voice_stream(translated_text, args.voice, session_folder, openai_client(), playback.play, audio_cache=tts_cache())
+        if ai_audio_path:
+            last_ai_audio_path = ai_audio_path
+            audio_files.append(ai_audio_path)
+
+    stages = [("transcribe", transcribe_stage), ("translate", translate_stage)]
+    if args.voice:
+        stages.append(("speak", speak_stage))
+    pipeline = Pipeline(stages)
+
+    def finish_utterance(frame=None):
+        audio_array = recorder.end_utterance(frame)
+        if audio_array.size > 0:
+            # Copy out of the ring buffer: the item may wait in the queue while capture continues
+            pipeline.submit(audio_array.copy())
 
-                        if args.voice:
-                            logging.info(f"Generating voice for translated text: {translated_text}")
-                            last_ai_audio_path = voice_stream(translated_text, args.voice, session_folder, openai_client, play_audio)
-                            audio_files.append(last_ai_audio_path)
-
-                        print_json_formatted({"Original": transcribed_text, "Translation": translated_text})
-
-            time.sleep(0.1)
+    is_recording = False
+    try:
+        while True:
+            # A manual recording is cut at MAX_UTTERANCE_SECONDS, so wait for a key no longer than that
+            timeout = max(MAX_UTTERANCE_SECONDS - recorder.elapsed(), 0) if is_recording and not vad else None
+            try:
+                event = events.get(timeout=timeout)
+            except queue.Empty:
+                # Keep recording in MAX_UTTERANCE_SECONDS pieces until SPACE is pressed
+                finish_utterance()
+                recorder.begin_utterance()
+                continue
+
+            if event == "exit":
+                break
+            elif event == "toggle":
+                is_recording = not is_recording
+                if is_recording:
+                    playback.cancel()
+                if vad:
+                    print(Fore.CYAN + ("\nListening..." if is_recording else "Listening paused.") + Style.RESET_ALL)
+                    if is_recording:
+                        # Start from the live edge of the capture and wake on every block from now on
+                        vad.reset(recorder.ring.frames_written)
+                        recorder.on_block = lambda: events.put("audio")
+                    else:
+                        recorder.on_block = None
+                        if vad.in_speech():  # paused mid-sentence: keep what was said
+                            recorder.begin_utterance(vad.speech_start)
+                            finish_utterance()
+                        vad.reset(recorder.ring.frames_written)
+                elif is_recording:
+                    print(Fore.CYAN + "\nRecording started. Press SPACE to stop or wait for 45 seconds." + Style.RESET_ALL)
+                    recorder.begin_utterance()
+                else:
+                    print(Fore.CYAN + "Recording stopped." + Style.RESET_ALL)
+                    finish_utterance()
+            elif event == "audio" and is_recording:
+                speech_start = vad.speech_start
+                for vad_event, frame in vad.process(recorder.ring):
+                    if vad_event == "start":
+                        recorder.begin_utterance(frame)
+                    else:
+                        finish_utterance(frame)
+                # "start" is only reported with its "end", after the speaker has finished; barge in as soon
+                # as speech is first seen instead
+                if barge_in_on_speech and vad.in_speech() and vad.speech_start != speech_start:
+                    playback.cancel()
 
     except Exception as e:
         print(Fore.RED + f"\nAn error occurred: {e}" + Style.RESET_ALL)
     finally:
         listener.stop()
+        recorder.on_block = None
+        recorder.close()
+        if pipeline.pending():
+            print(Fore.CYAN + "Finishing queued utterances..." + Style.RESET_ALL)
+        pipeline.close()
+        playback.close()
+        if writer:
+            writer.close()
         handle_session_files(audio_files, session_folder, args.save_recordings)
 
 def single_run_mode(content, args, session_folder):
@@ -276,8 +396,13 @@ def single_run_mode(content, args, session_folder):
 
     The function does not return anything.
     """
+    from audio_processing import play_audio, VoiceActivityDetector, trim_silence, record_until_stopped
+
     audio_files = []
     last_ai_audio_path = None
+    writer = None if args.discard_recordings else BackgroundWriter()
+    vad = VoiceActivityDetector(**(config.get("vad") or {})) if args.vad else None
+    playback = PlaybackQueue(play_audio)
 
     print(Fore.GREEN + "Press the space bar to start recording, 'r' to replay the last translation, or 'exit' to quit:" + Style.RESET_ALL)
 
@@ -285,29 +410,41 @@ def single_run_mode(content, args, session_folder):
         while True:
             user_input = single_run_input_loop()
             if user_input == " ":
-                audio_data = record_audio(args.duration or 20, session_folder)
-                if audio_data.size > 0:  # Use .size to check if the numpy array is empty
-                    audio_file_path = os.path.join(session_folder, f"audio_{int(time.time())}.wav")
-                    wavio.write(audio_file_path, audio_data, RATE, sampwidth=SAMPLE_WIDTH)
-                    audio_files.append(audio_file_path)
-                    transcribed_text = transcribe_audio(audio_file_path, groq_client)
+                playback.cancel()  # stop a replay that is still playing
+                if vad:
+                    print(Fore.CYAN + "Recording... stop talking or press SPACE/ENTER to finish." + Style.RESET_ALL)
+                else:
+                    print(Fore.CYAN + "Recording... press SPACE/ENTER to finish." + Style.RESET_ALL)
+                audio_data = record_until_stopped(args.duration or 20, vad)
+                flush_input()
+                if audio_data is not None and not args.no_trim:
+                    audio_data = trim_silence(audio_data, **TRIM_SETTINGS)
+                if audio_data is not None and audio_data.size > 0:  # Use .size to check if the numpy array is empty
+                    wav_bytes = encode_wav(audio_data)
+                    if writer:
+                        audio_file_path = os.path.join(session_folder, f"audio_{int(time.time())}.wav")
+                        writer.write(audio_file_path, wav_bytes)
+                        audio_files.append(audio_file_path)
+                    upload, upload_name = encode_upload(audio_data, wav_bytes)
+                    transcribed_text = transcribe_audio(upload, groq_client(), file_name=upload_name)
 
                     if transcribed_text:
-                        translated_text = translate_text(transcribed_text, content, config["openai"]["api_key"])
+                        translated_text = translate_live(transcribed_text, content, args.stream)
                         save_transcription(session_folder, transcribed_text, translated_text)
 
                         if args.voice:
-                            ai_audio_path = voice_stream(translated_text, args.voice, session_folder, openai_client, play_audio)
+                            ai_audio_path = voice_stream(translated_text, args.voice, session_folder, openai_client(), playback.play, audio_cache=tts_cache())
                             audio_files.append(ai_audio_path)
                             last_ai_audio_path = ai_audio_path
 
-                        print_json_formatted({"Original": transcribed_text, "Translation": translated_text})
+                        if not args.stream:
+                            print_json_formatted({"Original": transcribed_text, "Translation": translated_text})
                 else:
-                    print("Recording was interrupted or failed. Please try again.")
+                    print("Recording was interrupted, failed or contained no speech. Please try again.")
 
             elif user_input.lower() == "r":
                 if last_ai_audio_path:
-                    play_audio(file_path=last_ai_audio_path)
+                    playback.enqueue(file_path=last_ai_audio_path)
                 else:
                     print("No previous translation to replay.")
 
@@ -317,6 +454,9 @@ def single_run_mode(content, args, session_folder):
     except KeyboardInterrupt:
         print(Fore.RED + "\nInterrupt received, cleaning up and exiting..." + Style.RESET_ALL)
     finally:
+        playback.close(cancel=True)
+        if writer:
+            writer.close()
         handle_session_files(audio_files, session_folder, args.save_recordings)
 
 def handle_session_files(audio_files, session_folder, save_recordings=False):
@@ -348,7 +488,11 @@ def handle_session_files(audio_files, session_folder, save_recordings=False):
     else:
         print(Fore.GREEN + f"All audio files are saved in {session_folder}." + Style.RESET_ALL)
 
-def process_file(file_path, content, action_choice):
+def batch_job_id(content, action_choice):
+    """Identify what a batch run produces, so files finished under another action or prompt are redone."""
+    return f"{action_choice}:{cache_key(content)[:16]}" if action_choice == "1" else action_choice
+
+def process_file(file_path, content, action_choice, manifest=None):
     """
     Process a file by transcribing its audio content and optionally translating it.
 
@@ -356,33 +500,58 @@ def process_file(file_path, content, action_choice):
         file_path (str): The path of the file to be processed.
         content (str): The content to be used for translation.
         action_choice (str): The choice of action to be performed.
+        manifest (BatchManifest, optional): Progress record of the batch run. Files already finished for the
+                                            same action and prompt are skipped, and files that were transcribed
+                                            but not translated resume from the stored transcription.
 
     Returns:
-        None
+        tuple or None: ``(text_file_name, result_content)`` for `save_to_desktop`, or None if the file was
+        skipped or could not be processed.
 
     This function takes a file path, a content string, and an action choice. It extracts the base name of the file,
-    generates a text file name based on the base name, and transcribes the audio content of the file using the `groq_client`.
+    generates a text file name based on the base name, and transcribes the audio content of the file using the `groq_client`,
+    streaming it through the decoder in upload-sized windows so long recordings of any supported format fit in memory.
     If the transcription is successful, it checks the action choice. If the action choice is "1", it translates the
     transcribed text using the `translate_text` function and saves the original and translated text in a result
     content string. If the action choice is not "1", it saves the transcribed text in the result content string.
-    Finally, it saves the result content in a text file on the desktop using the `save_to_desktop` function.
 
     Note:
-        - The function assumes that the `groq_client` and the `config` dictionary are defined in the global scope.
-        - The function does not return anything.
+        - The function assumes that `groq_client`, the `config` dictionary and the `provider_limiter` are
+          defined in the global scope.
+        - The function is safe to call from several threads at once; `provider_limiter` bounds the number of
+          concurrent requests to each API.
     """
     base_name = os.path.basename(file_path)
     text_file_name = f"{os.path.splitext(base_name)[0]}_transcription.txt"
-    
-    transcribed_text = transcribe_audio(file_path, groq_client)
+
+    entry = manifest.lookup(file_path) if manifest else None
+    if entry and entry["stage"] == "done" and entry.get("job") == batch_job_id(content, action_choice) \
+            and os.path.exists(entry.get("output", "")):
+        logging.info(f"Skipping {file_path}: already saved to {entry['output']}")
+        return None
+
+    transcribed_text = entry.get("transcription") if entry else None
+    if transcribed_text:
+        logging.info(f"Resuming {file_path} from its stored transcription")
+    else:
+        with provider_limiter.slot("groq"):
+            transcribed_text = transcribe_file(
+                file_path, groq_client(), UPLOAD_CODEC, UPLOAD_BITRATE, cache=transcription_cache(), chunking=CHUNKING,
+            )
+        if transcribed_text and manifest:
+            manifest.record(file_path, "transcribed", transcription=transcribed_text)
     if transcribed_text:
         if action_choice == "1":  # Transcribe and translate
-            translated_text = translate_text(transcribed_text, content, config["openai"]["api_key"])
+            with provider_limiter.slot("openai"):
+                translated_text = translate_text(transcribed_text, content, config["openai"]["api_key"], cache=translation_cache())
+            if translated_text is None:
+                return None  # left at "transcribed", so a rerun retries only the translation
             result_content = f"Original: {transcribed_text}\nTranslation: {translated_text}"
         else:  # Only transcribe
             result_content = f"Transcription: {transcribed_text}"
-        
-        save_to_desktop(text_file_name, result_content)
+
+        return text_file_name, result_content
+    return None
 
 def main():
     """
@@ -409,6 +578,12 @@ def main():
     args = parse_arguments()
     print_welcome_message()
 
+    # Warm up the API connections while the user is still choosing a language
+    http_client.prewarm(
+        urls=[OPENAI_CHAT_URL],
+        callables=[lambda: groq_client().models.list()] + ([lambda: openai_client().models.list()] if args.voice else []),
+    )
+
     if args.content is None or args.content == '':
         selected_language = get_language_choice(language_map)
         content = get_modified_content(selected_language)
@@ -425,10 +600,28 @@ def main():
         if action_choice is None:
             sys.exit(1)
 
-        files_to_process = glob.glob(os.path.join(path, "*.wav")) if os.path.isdir(path) else [path]
+        if os.path.isdir(path):
+            files_to_process = sorted(
+                file for file in glob.glob(os.path.join(path, "*")) if file.lower().endswith(AUDIO_EXTENSIONS)
+            )
+        else:
+            files_to_process = [path]
 
-        for file_path in files_to_process:
-            process_file(file_path, content, action_choice)
+        # Files are processed concurrently; results are saved in file order as they become available.
+        # The manifest lets an interrupted run pick up where it stopped.
+        manifest = BatchManifest(batch_manifest_path)
+        try:
+            for file_path, result in run_batch(
+                files_to_process, lambda file_path: process_file(file_path, content, action_choice, manifest),
+                workers=batch_workers, description="Files",
+            ):
+                if result:
+                    output_path = save_to_desktop(*result)
+                    manifest.record(file_path, "done", output=str(output_path), job=batch_job_id(content, action_choice))
+        finally:
+            manifest.close()
+        if _caches.get("transcription"):
+            logging.info(f"Transcription cache: {_caches['transcription'].stats()}")
     else:
         session_folder = create_session_folder()
         if args.continuous:
@@ -436,5 +629,12 @@ def main():
         else:
             single_run_mode(content, args, session_folder)
 
+    # Only the caches this run actually opened
+    if _caches.get("translation"):
+        logging.info(f"Translation cache: {_caches['translation'].stats()}")
+        _caches["translation"].close()
+    if _caches.get("tts"):
+        logging.info(f"TTS cache: {_caches['tts'].stats()}")
+
 if __name__ == "__main__":
     main()
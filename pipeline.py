@@ -0,0 +1,71 @@
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class Pipeline:
+    """
+    Runs a chain of processing stages on their own worker threads, connected by bounded queues.
+
+    Each stage has exactly one worker, so items leave every stage in the order they were submitted while
+    different items occupy different stages at the same time. Throughput is therefore bounded by the
+    slowest stage rather than by the sum of all stages.
+
+    A stage function receives the output of the previous stage and returns the input for the next one.
+    Returning None drops the item (e.g. nothing was transcribed); an exception is logged and drops it too.
+
+    Args:
+        stages (list): ``(name, func)`` pairs, in processing order.
+        maxsize (int, optional): Capacity of each queue. When full, ``submit`` blocks, applying back-pressure
+                                 to the producer. Defaults to 4.
+
+    Example:
+        pipeline = Pipeline([("transcribe", transcribe), ("translate", translate)])
+        pipeline.submit(audio)
+        pipeline.close()  # waits for queued items to finish
+    """
+
+    def __init__(self, stages, maxsize=4):
+        self._queues = [queue.Queue(maxsize=maxsize) for _ in stages]
+        self._threads = []
+        for index, (name, func) in enumerate(stages):
+            output = self._queues[index + 1] if index + 1 < len(stages) else None
+            thread = threading.Thread(
+                target=self._run, args=(name, func, self._queues[index], output), name=f"pipeline-{name}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    @staticmethod
+    def _run(name, func, input_queue, output_queue):
+        while True:
+            item = input_queue.get()
+            if item is _STOP:
+                if output_queue is not None:
+                    output_queue.put(_STOP)
+                return
+            try:
+                result = func(item)
+            except Exception as e:
+                logger.error(f"Pipeline stage '{name}' failed: {e}")
+                continue
+            if result is not None and output_queue is not None:
+                output_queue.put(result)
+
+    def submit(self, item):
+        """Queue ``item`` for the first stage, blocking while that stage's queue is full."""
+        self._queues[0].put(item)
+
+    def pending(self):
+        """Return the approximate number of items waiting in the queues."""
+        return sum(q.qsize() for q in self._queues)
+
+    def close(self):
+        """Let every queued item finish, then stop the workers."""
+        self._queues[0].put(_STOP)
+        for thread in self._threads:
+            thread.join()
@@ -0,0 +1,207 @@
+import logging
+import queue
+import threading
+import time
+import wave
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_WIDTH = 2  # int16
+WAV_BLOCK_FRAMES = 4096
+WRITE_MS = 50  # audio handed to the device per write; bounds how late a cancellation takes effect
+
+
+class AudioPlayer:
+    """
+    Plays 16-bit PCM through one long-lived output stream.
+
+    The audio device is opened once and kept running between clips, so starting playback costs a buffer
+    write instead of a process spawn, a format probe and a device open. The stream is reopened only when a
+    clip arrives at a different sample rate or channel count.
+
+    Args:
+        rate (int, optional): The initial sample rate. Defaults to 24000 (OpenAI TTS PCM output).
+        channels (int, optional): The initial channel count. Defaults to 1.
+
+    Raises:
+        OSError: If sounddevice is unavailable or no output device can be opened.
+    """
+
+    def __init__(self, rate=24000, channels=1):
+        try:
+            import sounddevice
+        except (ImportError, OSError) as e:
+            raise OSError(f"sounddevice unavailable: {e}") from e
+        self._sounddevice = sounddevice
+        self._lock = threading.Lock()
+        self._stream = None
+        self._open(rate, channels)
+
+    def _open(self, rate, channels):
+        if self._stream is not None:
+            self._stream.close()
+        try:
+            self._stream = self._sounddevice.RawOutputStream(
+                samplerate=rate, channels=channels, dtype="int16", latency="low"
+            )
+            self._stream.start()
+        except Exception as e:
+            self._stream = None
+            raise OSError(f"Could not open the audio output: {e}") from e
+        self.rate, self.channels = rate, channels
+
+    def play_pcm(self, chunks, rate, channels=1, cancel=None):
+        """
+        Play raw little-endian int16 audio, blocking until it has been heard or ``cancel`` is set.
+
+        Args:
+            chunks (iterable): Byte chunks of any size (a frame may be split across chunks). Each chunk is
+                               played as soon as it arrives.
+            rate (int): The sample rate of the audio.
+            channels (int, optional): The channel count. Defaults to 1.
+            cancel (threading.Event, optional): Stops playback within about WRITE_MS when set; audio already
+                                                queued on the device is discarded. Defaults to None.
+
+        Returns:
+            bool: False if playback was cancelled, True otherwise.
+        """
+        with self._lock:
+            if self._stream is None or (rate, channels) != (self.rate, self.channels):
+                self._open(rate, channels)
+            frame_size = SAMPLE_WIDTH * channels
+            write_size = max(rate * WRITE_MS // 1000, 1) * frame_size
+            remainder = b""
+            for chunk in chunks:
+                data = remainder + bytes(chunk)
+                whole = len(data) - len(data) % frame_size
+                remainder = data[whole:]
+                for start in range(0, whole, write_size):
+                    if cancel is not None and cancel.is_set():
+                        self._stream.abort()  # drop what the device still holds
+                        self._stream.start()
+                        return False
+                    self._stream.write(data[start:min(start + write_size, whole)])
+            # Writes return once the audio is queued; wait for the device to play out what it holds
+            if cancel is not None:
+                if cancel.wait(self._stream.latency):
+                    self._stream.abort()
+                    self._stream.start()
+                    return False
+            else:
+                time.sleep(self._stream.latency)
+            return True
+
+    def play_wav(self, file_path, cancel=None):
+        """
+        Play an uncompressed 16-bit WAV file (see `play_pcm`).
+
+        Raises:
+            wave.Error: If the file is not 16-bit PCM WAV (the caller should fall back to another player).
+        """
+        with wave.open(str(file_path), "rb") as wav_file:
+            if wav_file.getsampwidth() != SAMPLE_WIDTH:
+                raise wave.Error(f"unsupported sample width {wav_file.getsampwidth()}")
+            blocks = iter(lambda: wav_file.readframes(WAV_BLOCK_FRAMES), b"")
+            return self.play_pcm(blocks, wav_file.getframerate(), wav_file.getnchannels(), cancel)
+
+    def close(self):
+        with self._lock:
+            if self._stream is not None:
+                self._stream.close()
+                self._stream = None
+
+
+_player = None
+_player_failed = False
+_player_lock = threading.Lock()
+
+
+def get_player():
+    """
+    Return the process-wide `AudioPlayer`, opening it on first use.
+
+    Returns:
+        AudioPlayer or None: None if no output device could be opened; the failure is logged once and
+        callers fall back to ffplay.
+    """
+    global _player, _player_failed
+    with _player_lock:
+        if _player is None and not _player_failed:
+            try:
+                _player = AudioPlayer()
+            except OSError as e:
+                logger.warning(f"In-process audio output unavailable, using ffplay: {e}")
+                _player_failed = True
+        return _player
+
+
+class PlaybackQueue:
+    """
+    Plays clips one at a time on a dedicated worker thread, so nothing else waits on audio output.
+
+    Clips are the keyword arguments of ``play_func`` (e.g. ``file_path=...`` or ``audio_stream=..., pcm_rate=...``),
+    which must accept a ``cancel`` event and stop promptly when it is set (as `audio_processing.play_audio` does).
+
+    ``enqueue`` returns immediately (e.g. a replay requested from a keyboard callback); ``play`` waits for its
+    clip, which is what a producer that must finish reading its own stream needs; ``cancel`` implements
+    barge-in by dropping queued clips and cutting off the one playing.
+
+    Args:
+        play_func (callable): Plays one clip, blocking until it ends or is cancelled.
+    """
+
+    def __init__(self, play_func):
+        self._play_func = play_func
+        self._queue = queue.Queue()
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._thread = threading.Thread(target=self._run, name="playback", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            generation, clip, done = item
+            with self._lock:
+                if generation != self._generation:  # cancelled while waiting
+                    done.set()
+                    continue
+                self._cancel.clear()
+            try:
+                self._play_func(cancel=self._cancel, **clip)
+            except Exception as e:
+                logger.error(f"Playback failed: {e}")
+            finally:
+                done.set()
+
+    def enqueue(self, **clip):
+        """
+        Queue a clip behind any that are waiting.
+
+        Returns:
+            threading.Event: Set once the clip has finished, was cancelled or was skipped.
+        """
+        done = threading.Event()
+        with self._lock:
+            self._queue.put((self._generation, clip, done))
+        return done
+
+    def play(self, **clip):
+        """Queue a clip and wait until it has finished or was cancelled."""
+        self.enqueue(**clip).wait()
+
+    def cancel(self):
+        """Barge-in: drop every queued clip and stop the one playing."""
+        with self._lock:
+            self._generation += 1
+            self._cancel.set()
+
+    def close(self, cancel=False):
+        """Stop the worker after the queued clips have played, or straight away with ``cancel``."""
+        if cancel:
+            self.cancel()
+        self._queue.put(None)
+        self._thread.join()
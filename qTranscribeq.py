@@ -1,89 +1,210 @@
 import streamlit as st
 import os
-import requests
+import hashlib
+import http_client
 import logging
 from pathlib import Path
-from pydub import AudioSegment
 from tqdm import tqdm
 import yaml
 import tempfile
+import math
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from audio_codec import (
+    RATE, AUDIO_EXTENSIONS, upload_settings, encode_audio, estimated_bytes_per_second, audio_cache_id,
+    audio_duration,
+)
+from caching import cache_key, open_transcription_cache, LRUCache
+from chunking import chunk_settings, silence_aligned_chunks, stitch_transcripts
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 logger = logging.getLogger(__name__)
 
-# Load configuration and initialize Groq client
+# Load configuration and initialize Groq client.
+# Streamlit re-executes this script on every widget interaction; resources are created once per server process.
+@st.cache_resource
 def load_config():
     with open("config.yaml", "r") as file:
         return yaml.safe_load(file)
 
+@st.cache_resource
+def load_transcription_cache():
+    return open_transcription_cache(load_config())
+
+@st.cache_resource
+def load_result_cache():
+    """
+    Finished transcriptions keyed by the uploaded file's content, so a rerun of the same upload (e.g. after
+    clicking the download button) is answered without reading or decoding the audio again.
+    """
+    settings = load_config().get("cache") or {}
+    entries = settings.get("result_entries", 32) if settings.get("enabled", True) else 0
+    return LRUCache(entries, ttl=settings.get("result_ttl_minutes", 60) * 60)
+
 config = load_config()
 groq_api_key = config["groq"]["api_key"]
+http_client.configure(config)
+GROQ_TRANSCRIPTION_URL = "https://api.groq.com/openai/v1/audio/transcriptions"
+UPLOAD_CODEC, UPLOAD_BITRATE = upload_settings(config)
+CHUNK_SECONDS, SEARCH_SECONDS, OVERLAP_SECONDS = chunk_settings(config)
+transcription_cache = load_transcription_cache()
+result_cache = load_result_cache()
+TRANSCRIPTION_MODEL = "whisper-large-v3"
+TRANSCRIPTION_PROMPT = "Please transcribe the audio content accurately."
+TRANSCRIPTION_LANGUAGE = "en"
+TRANSCRIPTION_TEMPERATURE = 0.0
+TRANSCRIPTION_WORKERS = max(int((config.get("chunking") or {}).get("workers", 4)), 1)
 
-def transcribe_audio(audio_file_path):
+def transcribe_audio(audio, file_name=None):
     """
-    Transcribes spoken words from an audio file into text using the Groq Whisper model.
+    Transcribes spoken words into text using the Groq Whisper model.
+
+    Args:
+        audio (str or bytes): The path of an audio file, or an encoded audio file in memory.
+        file_name (str, optional): The upload file name for in-memory audio; its extension tells the API
+                                   the format. Defaults to the base name of the path, or "audio.wav".
     """
     try:
-        with open(audio_file_path, "rb") as audio_file:
-            response = requests.post(
-                "https://api.groq.com/openai/v1/audio/transcriptions",
-                headers={
-                    "Authorization": f"Bearer {groq_api_key}",
-                },
-                files={
-                    "file": audio_file,
-                },
-                data={
-                    "model": "whisper-large-v3",
-                    "prompt": "Please transcribe the audio content accurately.",
-                    "response_format": "json",
-                    "language": "en",
-                    "temperature": 0.0,
-                },
-            )
-            response_data = response.json()
-            if response.status_code == 200 and "text" in response_data:
-                return response_data["text"]
-            else:
-                logger.error(f"Failed to transcribe audio: {response_data}\n")
-                return None
+        if isinstance(audio, (bytes, bytearray)):
+            audio_bytes = audio
+            file_name = file_name or "audio.wav"
+        else:
+            with open(audio, "rb") as audio_file:
+                # Read into memory so the body can be re-sent if the request is retried
+                audio_bytes = audio_file.read()
+            file_name = file_name or os.path.basename(audio)
+        response = http_client.post(
+            GROQ_TRANSCRIPTION_URL,
+            headers={
+                "Authorization": f"Bearer {groq_api_key}",
+            },
+            files={
+                "file": (file_name, audio_bytes),
+            },
+            data={
+                "model": TRANSCRIPTION_MODEL,
+                "prompt": TRANSCRIPTION_PROMPT,
+                "response_format": "json",
+                "language": TRANSCRIPTION_LANGUAGE,
+                "temperature": TRANSCRIPTION_TEMPERATURE,
+            },
+        )
+        response_data = response.json()
+        if response.status_code == 200 and "text" in response_data:
+            return response_data["text"]
+        else:
+            logger.error(f"Failed to transcribe audio: {response_data}\n")
+            return None
     except Exception as e:
         logger.error(f"Transcription failed due to an error: {e}\n")
         return None
 
-def get_chunk_length_ms(file_path, max_size_mb=24):
+def get_chunk_length_ms(max_size_mb=24, codec=UPLOAD_CODEC, bitrate=UPLOAD_BITRATE):
     """
-    Calculates the appropriate chunk length in milliseconds based on the file size.
+    Calculates the appropriate chunk length in milliseconds for the upload codec.
+
+    Chunks are exported as 16 kHz mono, so their size depends only on duration and codec, not on the
+    format of the source file. `chunking.chunk_seconds` in config.yaml can lower the length further.
     """
-    audio = AudioSegment.from_file(file_path)
-    file_size = os.path.getsize(file_path)
-    duration_ms = len(audio)
     max_size_bytes = max_size_mb * 1024 * 1024  # Slightly less than 25 MB to account for overhead
-    chunk_length_ms = int(max_size_bytes / file_size * duration_ms)
-    logger.info(f"Calculated chunk length: {chunk_length_ms} ms")
+    chunk_length_ms = int(max_size_bytes / estimated_bytes_per_second(codec, bitrate) * 1000)
+    if CHUNK_SECONDS:  # shorter chunks requested in config.yaml
+        chunk_length_ms = min(chunk_length_ms, int(CHUNK_SECONDS * 1000))
+    logger.info(f"Calculated chunk length for {codec}: {chunk_length_ms} ms")
     return chunk_length_ms
 
 def split_audio(file_path, chunk_length_ms):
     """
-    Splits the audio file into smaller chunks.
+    Decodes the audio file incrementally into 16 kHz mono chunks of at most ``chunk_length_ms``.
+
+    Each chunk ends in the quietest spot of the last SEARCH_SECONDS before its target length, so words are
+    not cut in half, and the next one starts OVERLAP_SECONDS earlier; `stitch_transcripts` drops the text
+    the overlap repeats. Only the current chunk is held in memory, so even multi-hour recordings use a flat
+    amount of RAM.
     """
-    audio = AudioSegment.from_file(file_path)
-    chunks = []
-    file_path = Path(file_path)  # Convert to Path object if it's a string
-    for i in range(0, len(audio), chunk_length_ms):
-        chunk = audio[i:i + chunk_length_ms]
-        chunk_file_path = f"{file_path.stem}_chunk{i // chunk_length_ms}.wav"
-        chunk.export(chunk_file_path, format="wav")
-        chunks.append(chunk_file_path)
-    return chunks
-
-def process_audio_file(file_path):
+    return silence_aligned_chunks(
+        file_path, max(chunk_length_ms * RATE // 1000, 1), int(SEARCH_SECONDS * RATE), int(OVERLAP_SECONDS * RATE)
+    )
+
+def transcribe_chunk(chunk):
+    """Encodes one chunk with the upload codec and transcribes it."""
+    upload, upload_name = encode_audio(chunk, UPLOAD_CODEC, RATE, UPLOAD_BITRATE)
+    return transcribe_audio(upload, upload_name)
+
+def transcribe_chunks(chunks, workers=TRANSCRIPTION_WORKERS, on_progress=None):
     """
-    Process the audio file: split if necessary, transcribe, and clean up.
+    Transcribes chunks concurrently and returns the texts in chunk order.
+
+    At most ``workers`` requests run at once, and no more than twice that many chunks are decoded ahead,
+    so memory stays bounded for long files. Rate limiting is handled by `http_client`, which pauses all
+    workers when the API answers 429.
+
+    Args:
+        chunks (iterable): Sample arrays, e.g. from `split_audio`.
+        workers (int, optional): Concurrent transcriptions. Defaults to TRANSCRIPTION_WORKERS.
+        on_progress (callable, optional): Called on the calling thread with the number of finished chunks
+                                          after each one completes.
+
+    Returns:
+        list: One text (or None for a failed chunk) per chunk.
+    """
+    results = {}
+    pending = {}
+    chunk_iter = enumerate(chunks)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        def fill():
+            for index, chunk in chunk_iter:
+                pending[pool.submit(transcribe_chunk, chunk)] = index
+                if len(pending) >= workers * 2:
+                    return
+
+        fill()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[pending.pop(future)] = future.result()
+                if on_progress:
+                    on_progress(len(results))
+            fill()
+    return [results[index] for index in range(len(results))]
+
+def result_key(*identity):
+    """Key for `result_cache`: what identifies the input, plus every setting that changes the transcription."""
+    return cache_key(
+        *identity, TRANSCRIPTION_MODEL, TRANSCRIPTION_PROMPT, TRANSCRIPTION_LANGUAGE, TRANSCRIPTION_TEMPERATURE,
+        UPLOAD_CODEC, UPLOAD_BITRATE, CHUNK_SECONDS, SEARCH_SECONDS, OVERLAP_SECONDS,
+    )
+
+def process_audio_file(file_path, memo_key=None):
+    """
+    Process the audio file: stream-decode it into chunks and transcribe them concurrently from memory.
+
+    Complete transcriptions are cached by `audio_cache_id` and the transcription settings, so the same file
+    is only transcribed once; identifying it costs no extra decode. With ``memo_key`` (from `result_key`), a complete
+    transcription is also kept in `result_cache` for the caller to check before the next call.
     """
-    audio = AudioSegment.from_file(file_path)
-    duration_seconds = len(audio) // 1000
+    key = None
+    if transcription_cache is not None:
+        try:
+            key = cache_key(
+                audio_cache_id(file_path), TRANSCRIPTION_MODEL, TRANSCRIPTION_PROMPT,
+                TRANSCRIPTION_LANGUAGE, TRANSCRIPTION_TEMPERATURE, UPLOAD_CODEC, UPLOAD_BITRATE,
+                CHUNK_SECONDS, SEARCH_SECONDS, OVERLAP_SECONDS,
+            )
+            cached = transcription_cache.get(key)
+            if cached is not None:
+                st.write("Loaded the transcription of this recording from the cache.")
+                if memo_key is not None:
+                    result_cache.put(memo_key, cached)
+                return cached
+        except OSError as e:
+            logger.warning(f"Could not identify {file_path}: {e}")
+
+    duration = audio_duration(file_path)
+    if duration is None:
+        st.error("Could not read the audio file.")
+        return None
+    duration_seconds = int(duration)
     st.write(f"The audio file is {duration_seconds} seconds long.")
     
     if duration_seconds > 600:  # 10 minutes
@@ -92,19 +213,31 @@ def process_audio_file(file_path):
             st.error("Transcription aborted by user.")
             return None
 
-    chunk_length_ms = get_chunk_length_ms(file_path)
-    chunks = split_audio(file_path, chunk_length_ms)
+    chunk_length_ms = get_chunk_length_ms()
+    # Cuts land up to SEARCH_SECONDS early and each chunk repeats OVERLAP_SECONDS, so chunks advance by less
+    step_ms = max(chunk_length_ms - (SEARCH_SECONDS / 2 + OVERLAP_SECONDS) * 1000, chunk_length_ms / 2)
+    expected_chunks = max(math.ceil(duration * 1000 / step_ms), 1)
 
-    all_transcriptions = []
     progress_bar = st.progress(0)
-    for i, chunk in enumerate(chunks):
-        transcribed_text = transcribe_audio(chunk)
-        if transcribed_text:
-            all_transcriptions.append(transcribed_text)
-        os.remove(chunk)  # Clean up chunk file after transcription
-        progress_bar.progress((i + 1) / len(chunks))
+    try:
+        chunk_texts = transcribe_chunks(
+            split_audio(file_path, chunk_length_ms),
+            on_progress=lambda finished: progress_bar.progress(min(finished / expected_chunks, 1.0)),
+        )
+    except OSError as e:
+        st.error(f"Could not decode the audio file: {e}")
+        return None
+    progress_bar.progress(1.0)
+    all_transcriptions = [text for text in chunk_texts if text]
 
-    return "\n".join(all_transcriptions)
+    full_transcription = stitch_transcripts(all_transcriptions, separator="\n")
+    # Only cache complete results, so a failed chunk is retried next time
+    if len(all_transcriptions) == len(chunk_texts):
+        if key is not None:
+            transcription_cache.put(key, full_transcription)
+        if memo_key is not None:
+            result_cache.put(memo_key, full_transcription)
+    return full_transcription
 
 def main():
     """
@@ -113,25 +246,36 @@ def main():
     st.title("gTranscribeq")
     st.write("Upload an audio file or enter the path to transcribe:")
 
-    uploaded_file = st.file_uploader("Drag and drop an audio file here", type=["wav", "mp3", "m4a"])
+    uploaded_file = st.file_uploader("Drag and drop an audio file here", type=[ext.lstrip(".") for ext in AUDIO_EXTENSIONS])
     file_path = st.text_input("Or enter the file path")
 
     if uploaded_file is not None:
-        # Save the uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-            tmp_file.write(uploaded_file.getvalue())
-            temp_path = tmp_file.name
+        data = uploaded_file.getvalue()
+        memo_key = result_key(hashlib.sha256(data).hexdigest())
+        full_transcription = result_cache.get(memo_key)
+        if full_transcription is None:
+            # Save the uploaded file temporarily
+            with tempfile.NamedTemporaryFile(delete=False, suffix=Path(uploaded_file.name).suffix.lower()) as tmp_file:
+                tmp_file.write(data)
+                temp_path = tmp_file.name
 
-        full_transcription = process_audio_file(temp_path)
-        os.unlink(temp_path)  # Remove the temporary file
+            full_transcription = process_audio_file(temp_path, memo_key)
+            os.unlink(temp_path)  # Remove the temporary file
 
-    elif st.button("Transcribe") and file_path:
+    elif (st.button("Transcribe") or st.session_state.get("transcribed_path") == file_path) and file_path:
+        # The button is only "clicked" for one rerun; remember the input as typed so later reruns keep the result
+        path_input = file_path
         file_path = Path(file_path)
-        if not file_path.exists() or not file_path.is_file() or file_path.suffix not in [".wav", ".mp3", ".m4a"]:
-            st.error("Invalid file path. Please provide a valid .wav, .mp3, or .m4a file.")
+        if not file_path.exists() or not file_path.is_file() or file_path.suffix.lower() not in AUDIO_EXTENSIONS:
+            st.error("Invalid file path. Please provide a valid .wav, .mp3, .m4a or .flac file.")
             return
 
-        full_transcription = process_audio_file(file_path)
+        st.session_state["transcribed_path"] = path_input
+        stat = file_path.stat()
+        memo_key = result_key(str(file_path.resolve()), stat.st_size, stat.st_mtime)
+        full_transcription = result_cache.get(memo_key)
+        if full_transcription is None:
+            full_transcription = process_audio_file(file_path, memo_key)
 
     else:
         return
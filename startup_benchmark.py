@@ -0,0 +1,97 @@
+"""
+Measure how long main.py takes to start, to catch import-time regressions.
+
+Usage:
+    python startup_benchmark.py                       # report
+    python startup_benchmark.py --save baseline.json  # record a baseline
+    python startup_benchmark.py --check baseline.json # exit 1 if startup got slower than the baseline allows
+
+Run it from the project directory (main.py loads config.yaml on import).
+"""
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def import_times(module="main"):
+    """
+    Import ``module`` in a fresh interpreter with ``-X importtime``.
+
+    Returns:
+        tuple: ``(total_ms, top_level)`` where ``top_level`` maps each top-level import to its cumulative
+        milliseconds.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        sys.exit(f"import {module} failed:\n{result.stderr[-2000:]}")
+    top_level = {}
+    total_ms = 0.0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+        _, cumulative_us, indent, name = match.groups()
+        cumulative_ms = int(cumulative_us) / 1000
+        if name == module:
+            total_ms = cumulative_ms
+        elif len(indent) == 2:  # imported directly by `module`
+            top_level[name] = cumulative_ms
+    return total_ms, top_level
+
+
+def launch_times(runs=5):
+    """Wall-clock milliseconds of ``python main.py --help``, once per run."""
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "main.py", "--help"], capture_output=True, check=True)
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure main.py startup time.")
+    parser.add_argument("--runs", type=int, default=5, help="Launches to time (the median is reported).")
+    parser.add_argument("--top", type=int, default=15, help="Slowest direct imports to list.")
+    parser.add_argument("--save", metavar="FILE", help="Write the results as a baseline.")
+    parser.add_argument("--check", metavar="FILE", help="Compare against a baseline and fail on regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slowdown against the baseline, as a fraction. Defaults to 0.2.")
+    args = parser.parse_args()
+
+    total_ms, top_level = import_times()
+    launch_ms = statistics.median(launch_times(args.runs))
+    print(f"{'import':<28} {'cumulative ms':>14}")
+    for name, cumulative_ms in sorted(top_level.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<28} {cumulative_ms:>14.1f}")
+    print(f"{'import main (total)':<28} {total_ms:>14.1f}")
+    print(f"{'main.py --help (median)':<28} {launch_ms:>14.1f}")
+
+    results = {"import_ms": total_ms, "launch_ms": launch_ms, "modules": top_level}
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+        print(f"Saved baseline to {args.save}")
+    if args.check:
+        with open(args.check, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = [
+            f"{metric}: {results[metric]:.1f} ms vs baseline {baseline[metric]:.1f} ms"
+            for metric in ("import_ms", "launch_ms")
+            if results[metric] > baseline[metric] * (1 + args.tolerance)
+        ]
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
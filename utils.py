@@ -7,6 +7,9 @@ import glob
 from colorama import Fore, Style, init
 import shutil
 import textwrap
+import threading
+import queue
+import re
 from datetime import datetime
 from pathlib import Path
 
@@ -30,15 +33,50 @@ def save_transcription(folder, original, translated):
     with open(os.path.join(folder, "transcriptions.txt"), "a", encoding="utf-8") as file:
         file.write(f"Original: {original}\nTranslated: {translated}\n\n")
 
+class BackgroundWriter:
+    """
+    Writes files on a daemon thread so that slow storage never delays the caller.
+
+    Use ``write`` to queue ``(path, data)`` and ``close`` to wait for all pending writes, e.g. before the
+    session files are listed or deleted.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="background-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            path, data = item
+            try:
+                with open(path, "wb") as file:
+                    file.write(data)
+            except Exception as e:
+                logger.error(f"Failed to write {path}: {e}")
+
+    def write(self, path, data):
+        """Queue ``data`` (bytes) to be written to ``path``."""
+        self._queue.put((path, data))
+
+    def close(self):
+        """Flush all queued writes and stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join()
+
 def save_to_desktop(file_name, content):
-    """Save content to a file on the desktop."""
+    """Save content to a file on the desktop and return its path."""
     desktop_path = Path.home() / "Desktop"
     file_path = desktop_path / file_name
     with open(file_path, "w", encoding="utf-8") as file:
         file.write(content)
     print(f"Saved: {file_path}")
+    return file_path
 
-from encoding_utils import safe_print
+from encoding_utils import safe_print, safe_encode
     
 def print_json_formatted(data, indent=4, width_percentage=0.65):
     """
@@ -88,4 +126,62 @@ def print_json_formatted(data, indent=4, width_percentage=0.65):
         safe_print(color + value_str + Style.RESET_ALL)
 
 
+def print_json_stream(key, tokens, indent=4):
+    """
+    Prints a single key in the same style as `print_json_formatted`, then renders its value piece by piece
+    as ``tokens`` yields it, so the user can start reading before the value is complete.
+
+    Args:
+        key (str): The key to print, e.g. "Translation".
+        tokens (iterable): Yields the pieces of the value as strings.
+        indent (int, optional): The number of spaces used for indentation. Defaults to 4.
+
+    Returns:
+        str: The complete value, stripped of surrounding whitespace.
+    """
+    key_str = json.dumps({key: ""}, indent=indent, ensure_ascii=False).rstrip(": {}\n")
+    color = Fore.MAGENTA if key == "Translation" else Fore.CYAN
+    safe_print(Fore.YELLOW + key_str + Style.RESET_ALL + ":")
+    pieces = []
+    for token in tokens:
+        pieces.append(token)
+        print(color + safe_encode(token) + Style.RESET_ALL, end="", flush=True)
+    print()
+    return "".join(pieces).strip()
+
+
+# Sentence ends: Latin punctuation followed by whitespace, or CJK/Arabic/Devanagari marks (often unspaced)
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+|(?<=[。！？؟।])\s*")
+
+def split_sentences(text, min_chars=40):
+    """
+    Split text into sentence-sized segments for speech synthesis.
+
+    Sentences shorter than ``min_chars`` are merged with the following one so that interjections like
+    "Yes." do not become separate requests.
+
+    Args:
+        text (str): The text to split.
+        min_chars (int, optional): The minimum segment length. Defaults to 40.
+
+    Returns:
+        list: The segments, in order. Joining them with spaces restores the text up to whitespace.
+    """
+    segments = []
+    current = ""
+    for sentence in SENTENCE_END.split(text.strip()):
+        if not sentence:
+            continue
+        current = f"{current} {sentence}" if current else sentence
+        if len(current) >= min_chars:
+            segments.append(current)
+            current = ""
+    if current:
+        if segments and len(current) < min_chars:
+            segments[-1] = f"{segments[-1]} {current}"
+        else:
+            segments.append(current)
+    return segments
+
+
 # Add more utility functions as needed
\ No newline at end of file